@@ -0,0 +1,134 @@
+import numpy as np
+
+ONE_THIRD = 1.0/3.0
+ONE_SIXTH = 1.0/6.0
+TWO_THIRD = 2.0/3.0
+
+def _v(m1, m2, hue):
+    hue = hue % 1.0
+    if hue < ONE_SIXTH:
+        return m1 + (m2-m1)*hue*6.0
+    if hue < 0.5:
+        return m2
+    if hue < TWO_THIRD:
+        return m1 + (m2-m1)*(TWO_THIRD-hue)*6.0
+    return m1
+
+
+def rgb_to_hls(r, g, b):
+    maxc = max(r, g, b)
+    minc = min(r, g, b)
+    sumc = (maxc+minc)
+    rangec = (maxc-minc)
+    l = sumc/2.0
+    if minc == maxc:
+        return 0.0, l, 0.0
+    if l <= 0.5:
+        s = rangec / sumc
+    else:
+        s = rangec / (2.0-maxc-minc)  # Not always 2.0-sumc: gh-106498.
+    rc = (maxc-r) / rangec
+    gc = (maxc-g) / rangec
+    bc = (maxc-b) / rangec
+    if r == maxc:
+        h = bc-gc
+    elif g == maxc:
+        h = 2.0+rc-bc
+    else:
+        h = 4.0+gc-rc
+    h = (h/6.0) % 1.0
+    return h, l, s
+
+def hls_to_rgb(h, l, s):
+    if s == 0.0:
+        return l, l, l
+    if l <= 0.5:
+        m2 = l * (1.0+s)
+    else:
+        m2 = l+s-(l*s)
+    m1 = 2.0*l - m2
+    return (_v(m1, m2, h+ONE_THIRD), _v(m1, m2, h), _v(m1, m2, h-ONE_THIRD))
+
+
+def rgb_to_cmyk(r, g, b):
+    if (r, g, b) == (0, 0, 0):
+        return 0, 0, 0, 1
+    c = 1 - r / 255
+    m = 1 - g / 255
+    y = 1 - b / 255
+    k = min(c, m, y)
+    c = (c - k) / (1 - k)
+    m = (m - k) / (1 - k)
+    y = (y - k) / (1 - k)
+    return round(c * 100), round(m * 100), round(y * 100), round(k * 100)
+
+def cmyk_to_rgb(c, m, y, k):
+    r = 255 * (1 - c / 100) * (1 - k / 100)
+    g = 255 * (1 - m / 100) * (1 - k / 100)
+    b = 255 * (1 - y / 100) * (1 - k / 100)
+    return round(r), round(g), round(b)
+
+
+# Array versions of the functions above. They take (..., 3) / (..., 4)
+# arrays (e.g. whole (H, W, 3) frames) and return the same values as the
+# scalar functions applied pixel by pixel.
+
+def _v_array(m1, m2, hue):
+    hue = hue % 1.0
+    return np.select(
+        [hue < ONE_SIXTH, hue < 0.5, hue < TWO_THIRD],
+        [m1 + (m2-m1)*hue*6.0, m2, m1 + (m2-m1)*(TWO_THIRD-hue)*6.0],
+        default=m1,
+    )
+
+
+def rgb_to_hls_array(rgb):
+    rgb = np.asarray(rgb, dtype=np.float64)
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    maxc = np.maximum(np.maximum(r, g), b)
+    minc = np.minimum(np.minimum(r, g), b)
+    sumc = (maxc+minc)
+    rangec = (maxc-minc)
+    l = sumc/2.0
+    grey = minc == maxc
+    with np.errstate(divide='ignore', invalid='ignore'):
+        s = np.where(l <= 0.5, rangec / sumc, rangec / (2.0-maxc-minc))
+        rc = (maxc-r) / rangec
+        gc = (maxc-g) / rangec
+        bc = (maxc-b) / rangec
+    h = np.where(r == maxc, bc-gc, np.where(g == maxc, 2.0+rc-bc, 4.0+gc-rc))
+    h = np.where(grey, 0.0, (h/6.0) % 1.0)
+    s = np.where(grey, 0.0, s)
+    return np.stack((h, l, s), axis=-1)
+
+def hls_to_rgb_array(hls):
+    hls = np.asarray(hls, dtype=np.float64)
+    h, l, s = hls[..., 0], hls[..., 1], hls[..., 2]
+    m2 = np.where(l <= 0.5, l * (1.0+s), l+s-(l*s))
+    m1 = 2.0*l - m2
+    rgb = np.stack((_v_array(m1, m2, h+ONE_THIRD), _v_array(m1, m2, h), _v_array(m1, m2, h-ONE_THIRD)), axis=-1)
+    grey = s == 0.0
+    rgb[grey] = l[grey, None]
+    return rgb
+
+
+def rgb_to_cmyk_array(rgb):
+    rgb = np.asarray(rgb)
+    cmy = 1 - rgb / 255
+    k = cmy.min(axis=-1)
+    black = k == 1
+    cmy = (cmy - k[..., None]) / np.where(black, 1, 1 - k)[..., None]
+    cmyk = np.empty(rgb.shape[:-1] + (4,), dtype=np.uint8)
+    cmyk[..., :3] = np.rint(cmy * 100)
+    cmyk[..., 3] = np.rint(k * 100)
+    # rgb_to_cmyk returns (0, 0, 0, 1) for black, not (0, 0, 0, 100)
+    cmyk[black] = (0, 0, 0, 1)
+    return cmyk
+
+def cmyk_to_rgb_array(cmyk):
+    cmyk = np.asarray(cmyk)
+    cmy = cmyk[..., :3]
+    k = cmyk[..., 3:]
+    rgb = 255 * (1 - cmy / 100) * (1 - k / 100)
+    # uint8 output, so values from out-of-range CMYK input are clipped
+    return np.clip(np.rint(rgb), 0, 255).astype(np.uint8)
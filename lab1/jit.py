@@ -0,0 +1,124 @@
+import argparse
+import os
+import time
+
+import numpy as np
+
+import colors
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Optional compiled per-pixel conversions. With numba installed the scalar
+# _v and rgb_to_hls from colors.py are JIT-compiled and run in a loop over
+# the pixels, with the machine code cached on disk (cache=True) so later
+# runs load it instead of compiling again. The results are the same as the
+# scalar functions applied pixel by pixel. Without numba, or with
+# LAB_BACKEND=python, the NumPy array versions in colors.py are used.
+
+# Backend selection, copied in lab3/jit.py (each lab is its own script dir).
+BACKENDS = ('python', 'numba')
+
+
+def resolve_backend(name=None):
+    name = name or os.environ.get('LAB_BACKEND', 'auto')
+    if name == 'auto':
+        return 'numba' if numba is not None else 'python'
+    if name not in BACKENDS:
+        raise ValueError(f'unknown backend {name!r}')
+    if name == 'numba' and numba is None:
+        raise ImportError('the numba backend needs numba installed')
+    return name
+
+
+PYTHON = {
+    'rgb_to_hls': colors.rgb_to_hls_array,
+    'hls_to_rgb': colors.hls_to_rgb_array,
+}
+
+if numba is not None:
+    _v = numba.njit(cache=True, nogil=True)(colors._v)
+    _rgb_to_hls = numba.njit(cache=True, nogil=True)(colors.rgb_to_hls)
+
+    @numba.njit(cache=True, nogil=True)
+    def _hls_to_rgb(h, l, s):
+        # colors.hls_to_rgb, calling the compiled _v.
+        if s == 0.0:
+            return l, l, l
+        if l <= 0.5:
+            m2 = l * (1.0+s)
+        else:
+            m2 = l+s-(l*s)
+        m1 = 2.0*l - m2
+        return (_v(m1, m2, h+colors.ONE_THIRD), _v(m1, m2, h), _v(m1, m2, h-colors.ONE_THIRD))
+
+    @numba.njit(cache=True, nogil=True)
+    def _rgb_to_hls_pixels(rgb, out):
+        for i in range(rgb.shape[0]):
+            out[i, 0], out[i, 1], out[i, 2] = _rgb_to_hls(rgb[i, 0], rgb[i, 1], rgb[i, 2])
+
+    @numba.njit(cache=True, nogil=True)
+    def _hls_to_rgb_pixels(hls, out):
+        for i in range(hls.shape[0]):
+            out[i, 0], out[i, 1], out[i, 2] = _hls_to_rgb(hls[i, 0], hls[i, 1], hls[i, 2])
+
+    def _per_pixel(kernel):
+        # (..., 3) arrays in and out, like the colors.py array functions.
+        def convert(values):
+            values = np.asarray(values, dtype=np.float64)
+            flat = np.ascontiguousarray(values.reshape(-1, 3))
+            out = np.empty_like(flat)
+            kernel(flat, out)
+            return out.reshape(values.shape)
+        return convert
+
+    NUMBA = {
+        'rgb_to_hls': _per_pixel(_rgb_to_hls_pixels),
+        'hls_to_rgb': _per_pixel(_hls_to_rgb_pixels),
+    }
+
+
+def converters(backend=None):
+    # name -> function for the backend; None means LAB_BACKEND, else auto.
+    return NUMBA if resolve_backend(backend) == 'numba' else PYTHON
+
+
+BACKEND = resolve_backend()
+rgb_to_hls_array = converters(BACKEND)['rgb_to_hls']
+hls_to_rgb_array = converters(BACKEND)['hls_to_rgb']
+
+
+def main():
+    # Times both backends on the same random frame and checks they agree.
+    parser = argparse.ArgumentParser(description='Compare the lab1 colour conversion backends.')
+    parser.add_argument('--size', type=int, default=1024, help='frame width and height')
+    parser.add_argument('--trials', type=int, default=5)
+    args = parser.parse_args()
+    if numba is None:
+        parser.error('numba is not installed, only the python backend is available')
+
+    rgb = np.random.default_rng(0).integers(0, 256, (args.size, args.size, 3)) / 255
+    for name in PYTHON:
+        values = rgb if name == 'rgb_to_hls' else PYTHON['rgb_to_hls'](rgb)
+        start = time.perf_counter()
+        NUMBA[name](values[:1, :1])
+        first = time.perf_counter() - start
+        results = {}
+        for backend in BACKENDS:
+            func = converters(backend)[name]
+            times = []
+            for _ in range(args.trials):
+                start = time.perf_counter()
+                results[backend] = func(values)
+                times.append(time.perf_counter() - start)
+            results[backend + '_ms'] = min(times) * 1000
+        if not np.array_equal(results['python'], results['numba']):
+            raise AssertionError(f'{name} backends differ')
+        print(f'{name:<12}python {results["python_ms"]:8.1f} ms  numba {results["numba_ms"]:8.1f} ms  '
+              f'({results["python_ms"] / results["numba_ms"]:.1f}x, first call {first * 1000:.0f} ms)')
+
+
+if __name__ == '__main__':
+    main()
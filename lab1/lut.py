@@ -0,0 +1,79 @@
+import os
+
+import numpy as np
+
+from colors import rgb_to_cmyk_array
+
+# Bump when the conversions in colors.py change so stale tables are rebuilt.
+LUT_VERSION = 1
+LUT_SIZE = 256 ** 3
+BUILD_CHUNK = 1 << 20
+
+_tables = {}
+
+
+def default_cache_dir():
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'lab1')
+
+
+def pack_rgb(rgb):
+    rgb = np.asarray(rgb, dtype=np.uint32)
+    return (rgb[..., 0] << 16) | (rgb[..., 1] << 8) | rgb[..., 2]
+
+
+def unpack_rgb(index):
+    index = np.asarray(index, dtype=np.uint32)
+    return np.stack((index >> 16, (index >> 8) & 0xFF, index & 0xFF), axis=-1).astype(np.uint8)
+
+
+def _build_cmyk(out):
+    for start in range(0, LUT_SIZE, BUILD_CHUNK):
+        rgb = unpack_rgb(np.arange(start, start + BUILD_CHUNK, dtype=np.uint32))
+        out[start:start + BUILD_CHUNK] = rgb_to_cmyk_array(rgb)
+
+
+def _build_hls(out):
+    # Stored in the units lab1 shows: degrees for H, percent for L and S.
+    # jit is imported here, where the compiled backend pays off, so that
+    # importing lut does not load numba.
+    from jit import rgb_to_hls_array
+    scale = np.array([360, 100, 100])
+    for start in range(0, LUT_SIZE, BUILD_CHUNK):
+        rgb = unpack_rgb(np.arange(start, start + BUILD_CHUNK, dtype=np.uint32))
+        out[start:start + BUILD_CHUNK] = np.rint(rgb_to_hls_array(rgb / 255) * scale)
+
+
+_BUILDERS = {
+    'cmyk': (np.uint8, 4, _build_cmyk),
+    'hls': (np.uint16, 3, _build_hls),
+}
+
+
+def load_table(name, cache_dir=None):
+    cache_dir = cache_dir or default_cache_dir()
+    path = os.path.join(cache_dir, f'rgb_{name}_v{LUT_VERSION}.npy')
+    table = _tables.get(path)
+    if table is not None:
+        return table
+
+    if not os.path.exists(path):
+        dtype, channels, build = _BUILDERS[name]
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        out = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=dtype, shape=(LUT_SIZE, channels))
+        build(out)
+        out.flush()
+        del out
+        os.replace(tmp_path, path)
+
+    table = np.load(path, mmap_mode='r')
+    _tables[path] = table
+    return table
+
+
+def rgb_to_cmyk_lut(rgb, cache_dir=None):
+    return load_table('cmyk', cache_dir)[pack_rgb(rgb)]
+
+def rgb_to_hls_lut(rgb, cache_dir=None):
+    return load_table('hls', cache_dir)[pack_rgb(rgb)]
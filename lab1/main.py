@@ -1,74 +1,4 @@
-import tkinter as tk
-from tkinter import colorchooser
-from tkinter import ttk
-
-ONE_THIRD = 1.0/3.0
-ONE_SIXTH = 1.0/6.0
-TWO_THIRD = 2.0/3.0
-
-def _v(m1, m2, hue):
-    hue = hue % 1.0
-    if hue < ONE_SIXTH:
-        return m1 + (m2-m1)*hue*6.0
-    if hue < 0.5:
-        return m2
-    if hue < TWO_THIRD:
-        return m1 + (m2-m1)*(TWO_THIRD-hue)*6.0
-    return m1
-
-
-def rgb_to_hls(r, g, b):
-    maxc = max(r, g, b)
-    minc = min(r, g, b)
-    sumc = (maxc+minc)
-    rangec = (maxc-minc)
-    l = sumc/2.0
-    if minc == maxc:
-        return 0.0, l, 0.0
-    if l <= 0.5:
-        s = rangec / sumc
-    else:
-        s = rangec / (2.0-maxc-minc)  # Not always 2.0-sumc: gh-106498.
-    rc = (maxc-r) / rangec
-    gc = (maxc-g) / rangec
-    bc = (maxc-b) / rangec
-    if r == maxc:
-        h = bc-gc
-    elif g == maxc:
-        h = 2.0+rc-bc
-    else:
-        h = 4.0+gc-rc
-    h = (h/6.0) % 1.0
-    return h, l, s
-
-def hls_to_rgb(h, l, s):
-    if s == 0.0:
-        return l, l, l
-    if l <= 0.5:
-        m2 = l * (1.0+s)
-    else:
-        m2 = l+s-(l*s)
-    m1 = 2.0*l - m2
-    return (_v(m1, m2, h+ONE_THIRD), _v(m1, m2, h), _v(m1, m2, h-ONE_THIRD))
-
-
-def rgb_to_cmyk(r, g, b):
-    if (r, g, b) == (0, 0, 0):
-        return 0, 0, 0, 1
-    c = 1 - r / 255
-    m = 1 - g / 255
-    y = 1 - b / 255
-    k = min(c, m, y)
-    c = (c - k) / (1 - k)
-    m = (m - k) / (1 - k)
-    y = (y - k) / (1 - k)
-    return round(c * 100), round(m * 100), round(y * 100), round(k * 100)
-
-def cmyk_to_rgb(c, m, y, k):
-    r = 255 * (1 - c / 100) * (1 - k / 100)
-    g = 255 * (1 - m / 100) * (1 - k / 100)
-    b = 255 * (1 - y / 100) * (1 - k / 100)
-    return round(r), round(g), round(b)
+from colors import rgb_to_hls, hls_to_rgb, rgb_to_cmyk, cmyk_to_rgb
 
 def update_color_from_rgb(event=None):
     try:
@@ -139,64 +69,69 @@ def choose_color():
         r, g, b = map(int, color_code)
         update_views(r, g, b)
 
-app = tk.Tk()
-app.title("Лаба 1")
+if __name__ == "__main__":
+    import tkinter as tk
+    from tkinter import colorchooser
+    from tkinter import ttk
 
-ttk.Label(app, text="RGB").grid(column=0, row=0, padx=5, pady=5, sticky='w')
-r_entry = ttk.Entry(app, width=5)
-r_entry.grid(column=1, row=0)
-r_slider = tk.Scale(app, from_=0, to=255, orient='horizontal', command=lambda e: update_color_from_rgb())
-r_slider.grid(column=2, row=0, sticky='ew')
+    app = tk.Tk()
+    app.title("Лаба 1")
 
-g_entry = ttk.Entry(app, width=5)
-g_entry.grid(column=1, row=1)
-g_slider = tk.Scale(app, from_=0, to=255, orient='horizontal', command=lambda e: update_color_from_rgb())
-g_slider.grid(column=2, row=1, sticky='ew')
+    ttk.Label(app, text="RGB").grid(column=0, row=0, padx=5, pady=5, sticky='w')
+    r_entry = ttk.Entry(app, width=5)
+    r_entry.grid(column=1, row=0)
+    r_slider = tk.Scale(app, from_=0, to=255, orient='horizontal', command=lambda e: update_color_from_rgb())
+    r_slider.grid(column=2, row=0, sticky='ew')
 
-b_entry = ttk.Entry(app, width=5)
-b_entry.grid(column=1, row=2)
-b_slider = tk.Scale(app, from_=0, to=255, orient='horizontal', command=lambda e: update_color_from_rgb())
-b_slider.grid(column=2, row=2, sticky='ew')
+    g_entry = ttk.Entry(app, width=5)
+    g_entry.grid(column=1, row=1)
+    g_slider = tk.Scale(app, from_=0, to=255, orient='horizontal', command=lambda e: update_color_from_rgb())
+    g_slider.grid(column=2, row=1, sticky='ew')
 
-ttk.Label(app, text="CMYK").grid(column=0, row=3, padx=5, pady=5, sticky='w')
-c_entry = ttk.Entry(app, width=5)
-c_entry.grid(column=1, row=3)
+    b_entry = ttk.Entry(app, width=5)
+    b_entry.grid(column=1, row=2)
+    b_slider = tk.Scale(app, from_=0, to=255, orient='horizontal', command=lambda e: update_color_from_rgb())
+    b_slider.grid(column=2, row=2, sticky='ew')
 
-m_entry = ttk.Entry(app, width=5)
-m_entry.grid(column=1, row=4)
+    ttk.Label(app, text="CMYK").grid(column=0, row=3, padx=5, pady=5, sticky='w')
+    c_entry = ttk.Entry(app, width=5)
+    c_entry.grid(column=1, row=3)
 
-y_entry = ttk.Entry(app, width=5)
-y_entry.grid(column=1, row=5)
+    m_entry = ttk.Entry(app, width=5)
+    m_entry.grid(column=1, row=4)
 
-k_entry = ttk.Entry(app, width=5)
-k_entry.grid(column=1, row=6)
+    y_entry = ttk.Entry(app, width=5)
+    y_entry.grid(column=1, row=5)
 
-ttk.Label(app, text="HLS").grid(column=0, row=7, padx=5, pady=5, sticky='w')
-h_entry = ttk.Entry(app, width=5)
-h_entry.grid(column=1, row=7)
+    k_entry = ttk.Entry(app, width=5)
+    k_entry.grid(column=1, row=6)
 
-l_entry = ttk.Entry(app, width=5)
-l_entry.grid(column=1, row=8)
+    ttk.Label(app, text="HLS").grid(column=0, row=7, padx=5, pady=5, sticky='w')
+    h_entry = ttk.Entry(app, width=5)
+    h_entry.grid(column=1, row=7)
 
-s_entry = ttk.Entry(app, width=5)
-s_entry.grid(column=1, row=9)
+    l_entry = ttk.Entry(app, width=5)
+    l_entry.grid(column=1, row=8)
 
-color_display = tk.Label(app, text="", bg="white", width=20, height=2)
-color_display.grid(column=3, row=0, rowspan=10, padx=10, pady=5)
+    s_entry = ttk.Entry(app, width=5)
+    s_entry.grid(column=1, row=9)
 
-# ttk.Button(app, text="Choose Color", command=choose_color).grid(column=0, row=10, columnspan=2, pady=10)
+    color_display = tk.Label(app, text="", bg="white", width=20, height=2)
+    color_display.grid(column=3, row=0, rowspan=10, padx=10, pady=5)
 
-r_entry.bind("<Return>", update_color_from_rgb)
-g_entry.bind("<Return>", update_color_from_rgb)
-b_entry.bind("<Return>", update_color_from_rgb)
+    # ttk.Button(app, text="Choose Color", command=choose_color).grid(column=0, row=10, columnspan=2, pady=10)
 
-c_entry.bind("<Return>", update_color_from_cmyk)
-m_entry.bind("<Return>", update_color_from_cmyk)
-y_entry.bind("<Return>", update_color_from_cmyk)
-k_entry.bind("<Return>", update_color_from_cmyk)
+    r_entry.bind("<Return>", update_color_from_rgb)
+    g_entry.bind("<Return>", update_color_from_rgb)
+    b_entry.bind("<Return>", update_color_from_rgb)
 
-h_entry.bind("<Return>", update_color_from_hls)
-l_entry.bind("<Return>", update_color_from_hls)
-s_entry.bind("<Return>", update_color_from_hls)
+    c_entry.bind("<Return>", update_color_from_cmyk)
+    m_entry.bind("<Return>", update_color_from_cmyk)
+    y_entry.bind("<Return>", update_color_from_cmyk)
+    k_entry.bind("<Return>", update_color_from_cmyk)
 
-app.mainloop()
\ No newline at end of file
+    h_entry.bind("<Return>", update_color_from_hls)
+    l_entry.bind("<Return>", update_color_from_hls)
+    s_entry.bind("<Return>", update_color_from_hls)
+
+    app.mainloop()
\ No newline at end of file
@@ -0,0 +1,144 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import cv2
+import numpy as np
+
+from filters import sharpen, morphological_open
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff', '.webp')
+
+
+def find_images(paths, recursive=False):
+    # Yields (file, root) pairs; outputs keep the file's path relative to root.
+    for path in paths:
+        if os.path.isfile(path):
+            yield path, os.path.dirname(path)
+            continue
+        for dirpath, dirnames, filenames in os.walk(path):
+            for name in sorted(filenames):
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    yield os.path.join(dirpath, name), path
+            if not recursive:
+                break
+            dirnames.sort()
+
+
+def output_path(path, root, output_dir, fmt):
+    relative = os.path.relpath(path, root)
+    if fmt != 'same':
+        relative = os.path.splitext(relative)[0] + '.' + fmt
+    return os.path.join(output_dir, relative)
+
+
+def encode_params(fmt, quality):
+    if fmt in ('jpg', 'jpeg'):
+        return [cv2.IMWRITE_JPEG_QUALITY, quality]
+    if fmt == 'webp':
+        return [cv2.IMWRITE_WEBP_QUALITY, quality]
+    if fmt == 'png':
+        # quality 0..100 maps to zlib level 9..0
+        return [cv2.IMWRITE_PNG_COMPRESSION, min(9, max(0, 9 - quality * 9 // 100))]
+    return []
+
+
+def init_worker():
+    # One process per core already; keep OpenCV from oversubscribing.
+    cv2.setNumThreads(1)
+
+
+def process_file(path, out_path, op, params, quality):
+    # decode -> filter -> encode. Reading and writing in the worker keeps
+    # pixel data out of the inter-process pipes. np.fromfile/tofile also
+    # handle non-ASCII paths, which cv2.imread/imwrite do not on Windows.
+    data = np.fromfile(path, dtype=np.uint8)
+    img = cv2.imdecode(data, cv2.IMREAD_COLOR)
+    if img is None:
+        raise ValueError(f'cannot decode {path}')
+    # The filters are per-channel, so BGR from OpenCV works as well as RGB.
+    if op == 'sharpen':
+        result = sharpen(img, params['coefficient'], size=params['sharpen_size'], shape=params['shape'])
+    else:
+        result = morphological_open(img, params['size'], shape=params['shape'])
+
+    ext = os.path.splitext(out_path)[1]
+    ok, encoded = cv2.imencode(ext, result, encode_params(ext[1:].lower(), quality))
+    if not ok:
+        raise ValueError(f'cannot encode {out_path}')
+    os.makedirs(os.path.dirname(out_path) or '.', exist_ok=True)
+    encoded.tofile(out_path)
+    return len(data), len(encoded)
+
+
+def run_batch(paths, output_dir, op='sharpen', coefficient=5, size=5, fmt='same', quality=90,
+              workers=None, queue_size=None, recursive=False, log=sys.stderr, sharpen_size=3, shape=None):
+    if shape is None:
+        shape = 'cross' if op == 'sharpen' else 'rect'
+    params = {'coefficient': coefficient, 'size': size, 'sharpen_size': sharpen_size, 'shape': shape}
+    workers = workers or os.cpu_count() or 1
+    # At most queue_size files are in flight, so a huge directory does not
+    # turn into a huge backlog of pending futures.
+    queue_size = queue_size or 2 * workers
+    stats = {'files': 0, 'failed': 0, 'bytes_in': 0, 'bytes_out': 0}
+    start = time.perf_counter()
+
+    def collect(done):
+        for future in done:
+            path = pending.pop(future)
+            try:
+                bytes_in, bytes_out = future.result()
+            except Exception as e:
+                stats['failed'] += 1
+                print(f'{path}: {e}', file=log)
+                continue
+            stats['files'] += 1
+            stats['bytes_in'] += bytes_in
+            stats['bytes_out'] += bytes_out
+
+    pending = {}
+    with ProcessPoolExecutor(workers, initializer=init_worker) as pool:
+        for path, root in find_images(paths, recursive):
+            if len(pending) >= queue_size:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            out_path = output_path(path, root, output_dir, fmt)
+            future = pool.submit(process_file, path, out_path, op, params, quality)
+            pending[future] = path
+        collect(wait(pending)[0])
+
+    stats['seconds'] = time.perf_counter() - start
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Apply a lab2 filter to every image in the given folders.')
+    parser.add_argument('paths', nargs='+', help='image files or directories')
+    parser.add_argument('-o', '--output', required=True, help='output directory')
+    parser.add_argument('--op', choices=['sharpen', 'open'], default='sharpen')
+    parser.add_argument('--coefficient', type=int, default=5, help='sharpen kernel centre')
+    parser.add_argument('--size', type=int, default=5, help='MORPH_OPEN kernel size')
+    parser.add_argument('--sharpen-size', type=int, default=3, help='sharpen kernel size')
+    parser.add_argument('--shape', choices=['rect', 'cross', 'ellipse'],
+                        help='kernel shape (default: cross for sharpen, rect for open)')
+    parser.add_argument('--format', default='same', choices=['same', 'jpg', 'png', 'webp', 'bmp', 'tiff'])
+    parser.add_argument('--quality', type=int, default=90, help='JPEG/WebP quality, PNG compression')
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--queue-size', type=int, help='max files in flight (default 2 x workers)')
+    parser.add_argument('-r', '--recursive', action='store_true')
+    args = parser.parse_args()
+
+    stats = run_batch(args.paths, args.output, args.op, args.coefficient, args.size, args.format,
+                      args.quality, args.workers, args.queue_size, args.recursive,
+                      sharpen_size=args.sharpen_size, shape=args.shape)
+    seconds = stats['seconds']
+    print(f'{stats["files"]} files, {stats["failed"]} failed in {seconds:.2f} s: '
+          f'{stats["files"] / seconds:.1f} files/s, '
+          f'{stats["bytes_in"] / 1e6 / seconds:.1f} MB/s in, {stats["bytes_out"] / 1e6 / seconds:.1f} MB/s out')
+    return 1 if stats['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
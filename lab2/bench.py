@@ -0,0 +1,195 @@
+import argparse
+import math
+import os
+import statistics
+import time
+import tracemalloc
+from functools import partial
+
+import cv2
+import numpy as np
+from PIL import Image
+
+import kernels
+from filters import sharpen, sharpen_kernel, morphological_open
+from tiles import DEFAULT_TILE_SIZE, sharpen_tiled, morphological_open_tiled
+
+
+def synthetic_image(megapixels, seed=0):
+    # 4:3 RGB noise image of roughly the given size.
+    width = int(math.sqrt(megapixels * 1e6 * 4 / 3))
+    height = int(megapixels * 1e6 / width)
+    return np.random.default_rng(seed).integers(0, 256, (height, width, 3), dtype=np.uint8)
+
+
+def time_median(func, repeats=5, warmup=1):
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def bench_tiles(args):
+    ops = {
+        'sharpen': (partial(sharpen, coefficient=5), partial(sharpen_tiled, coefficient=5)),
+        'open': (partial(morphological_open, size=5), partial(morphological_open_tiled, size=5)),
+    }
+    print(f'{"op":<9}{"MP":>6}{"workers":>9}{"ms":>10}{"speedup":>9}')
+    for megapixels in args.sizes:
+        img = synthetic_image(megapixels)
+        for name, (single, tiled) in ops.items():
+            base = time_median(lambda: single(img), args.repeats)
+            print(f'{name:<9}{megapixels:>6}{"single":>9}{base * 1000:>10.1f}{1:>8.2f}x')
+            for workers in args.workers:
+                run = partial(tiled, img, tile_size=args.tile_size, workers=workers)
+                if not np.array_equal(run(), single(img)):
+                    raise AssertionError(f'tiled {name} differs from single-shot')
+                elapsed = time_median(run, args.repeats)
+                print(f'{name:<9}{megapixels:>6}{workers:>9}{elapsed * 1000:>10.1f}{base / elapsed:>8.2f}x')
+
+
+def legacy_sharpen(pil_img, coefficient):
+    # The lab2 pipeline before filters stopped swizzling channels: four
+    # full-frame copies around one filter2D call.
+    kernel = np.array([[0, -1, 0], [-1, coefficient, -1], [0, -1, 0]])
+    img_cv = cv2.cvtColor(np.array(pil_img), cv2.COLOR_RGB2BGR)
+    sharpened = cv2.filter2D(img_cv, -1, kernel)
+    return Image.fromarray(cv2.cvtColor(sharpened, cv2.COLOR_BGR2RGB))
+
+def current_sharpen(img, coefficient, out):
+    return Image.fromarray(sharpen(img, coefficient, out=out))
+
+
+def peak_allocation(func):
+    # Peak bytes allocated while func runs; NumPy and OpenCV's Python
+    # arrays both report their buffers to tracemalloc.
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_copies(args):
+    print(f'{"pipeline":<10}{"MP":>6}{"ms":>10}{"peak MB":>10}')
+    for megapixels in args.sizes:
+        img = synthetic_image(megapixels)
+        pil_img = Image.fromarray(img)
+        out = np.empty_like(img)
+        pipelines = {
+            'legacy': partial(legacy_sharpen, pil_img, 5),
+            'current': partial(current_sharpen, img, 5, out),
+        }
+        if not np.array_equal(np.asarray(pipelines['legacy']()), np.asarray(pipelines['current']())):
+            raise AssertionError('pipelines disagree')
+        for name, run in pipelines.items():
+            elapsed = time_median(run, args.repeats)
+            peak = peak_allocation(run)
+            print(f'{name:<10}{megapixels:>6}{elapsed * 1000:>10.1f}{peak / 1e6:>10.1f}')
+
+
+def bench_kernels(args):
+    # Direct OpenCV calls with the full kernel vs the kernels.py fast paths.
+    # Note cv2.filter2D itself switches to a DFT for kernels from 11x11.
+    img = synthetic_image(args.megapixels)
+    pixels = img.shape[0] * img.shape[1]
+    print(f'{"op":<15}{"size":>6}{"direct ns/px":>14}{"fast ns/px":>12}')
+    for shape in args.shapes:
+        for size in args.kernel_sizes:
+            element = kernels.structuring_element(shape, size)
+            ops = {
+                f'sharpen {shape}': (
+                    partial(cv2.filter2D, img, -1, sharpen_kernel(5, size, shape)),
+                    partial(kernels.sharpen, img, 5, size, shape),
+                ),
+                f'open {shape}': (
+                    partial(cv2.morphologyEx, img, cv2.MORPH_OPEN, element),
+                    partial(kernels.morphological_open, img, size, shape),
+                ),
+            }
+            for name, (direct, fast) in ops.items():
+                if not np.array_equal(direct(), fast()):
+                    raise AssertionError(f'{name} {size}: fast path differs')
+                direct_time = time_median(direct, args.repeats)
+                fast_time = time_median(fast, args.repeats)
+                print(f'{name:<15}{size:>6}{direct_time / pixels * 1e9:>14.2f}{fast_time / pixels * 1e9:>12.2f}')
+
+
+def legacy_display(canvas, img):
+    # display_image before DisplaySurface: a new PhotoImage and a new
+    # canvas item per call.
+    from PIL import ImageTk
+    image = Image.fromarray(img)
+    image.thumbnail((400, 400))
+    img_tk = ImageTk.PhotoImage(image)
+    canvas.create_image(0, 0, anchor='nw', image=img_tk)
+    canvas.image = img_tk
+
+
+def bench_display(args):
+    # Needs a display. Each update is drawn (update_idletasks) before the
+    # clock stops, so the time includes Tk's redraw of the canvas.
+    import tkinter as tk
+    from display import DisplaySurface
+
+    app = tk.Tk()
+    frames = [synthetic_image(args.megapixels, seed) for seed in range(4)]
+    print(f'{"display":<9}{"median ms":>11}{"last ms":>9}{"items":>7}')
+    for name in ('legacy', 'surface'):
+        canvas = tk.Canvas(app, width=400, height=400)
+        canvas.pack()
+        if name == 'legacy':
+            update = partial(legacy_display, canvas)
+        else:
+            update = DisplaySurface(canvas).show
+        samples = []
+        for i in range(args.updates):
+            start = time.perf_counter()
+            update(frames[i % len(frames)])
+            app.update_idletasks()
+            samples.append(time.perf_counter() - start)
+        last = statistics.median(samples[-args.updates // 10:])
+        print(f'{name:<9}{statistics.median(samples) * 1000:>11.2f}{last * 1000:>9.2f}{len(canvas.find_all()):>7}')
+        canvas.destroy()
+    app.destroy()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks for the lab2 filters.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    tiles = commands.add_parser('tiles', help='single-shot vs tiled filtering')
+    tiles.add_argument('--sizes', nargs='+', type=float, default=[1, 4, 16], help='image sizes in megapixels')
+    tiles.add_argument('--workers', nargs='+', type=int, default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    tiles.add_argument('--tile-size', type=int, default=DEFAULT_TILE_SIZE)
+    tiles.add_argument('--repeats', type=int, default=5)
+    tiles.set_defaults(func=bench_tiles)
+
+    copies = commands.add_parser('copies', help='allocations of the legacy vs current sharpen pipeline')
+    copies.add_argument('--sizes', nargs='+', type=float, default=[12, 50], help='image sizes in megapixels')
+    copies.add_argument('--repeats', type=int, default=5)
+    copies.set_defaults(func=bench_copies)
+
+    kernel_sizes = commands.add_parser('kernels', help='per-pixel cost vs kernel size')
+    kernel_sizes.add_argument('--megapixels', type=float, default=4)
+    kernel_sizes.add_argument('--kernel-sizes', nargs='+', type=int, default=[3, 5, 11, 15, 21, 31, 51])
+    kernel_sizes.add_argument('--shapes', nargs='+', choices=sorted(kernels.SHAPES), default=['rect', 'cross'])
+    kernel_sizes.add_argument('--repeats', type=int, default=3)
+    kernel_sizes.set_defaults(func=bench_kernels)
+
+    display = commands.add_parser('display', help='Tk display latency and canvas items after many updates')
+    display.add_argument('--megapixels', type=float, default=4)
+    display.add_argument('--updates', type=int, default=1000)
+    display.set_defaults(func=bench_display)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
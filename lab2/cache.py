@@ -0,0 +1,65 @@
+import os
+import threading
+from collections import OrderedDict
+
+DEFAULT_BUDGET = 1 << 30
+
+
+def file_key(path):
+    # Identifies a file's current contents: a rewritten file gets a new key.
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_mtime_ns, stat.st_size
+
+
+class ImageCache:
+    # LRU cache of ndarrays bounded by their total size in bytes. Stored
+    # arrays are made read-only, since every hit hands out the same object.
+    # Keys are tuples such as (file_key(path), 'sharpen', (coefficient,)).
+    def __init__(self, max_bytes=DEFAULT_BUDGET):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                return default
+            self._items.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        size = value.nbytes
+        if size > self.max_bytes:
+            return
+        value.flags.writeable = False
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.nbytes -= old.nbytes
+            self._items[key] = value
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.nbytes = 0
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._items
+
+    def __len__(self):
+        with self._lock:
+            return len(self._items)
@@ -0,0 +1,26 @@
+from PIL import Image, ImageTk
+
+from preview import PREVIEW_SIZE, make_proxy
+
+
+class DisplaySurface:
+    # One canvas item and one PhotoImage, reused for every frame. show()
+    # area-averages the ndarray down to the canvas size and pastes the
+    # pixels into the existing PhotoImage. A new PhotoImage is only made
+    # when the displayed size changes, e.g. after loading another image.
+    # Creating an item per frame would leave every old one on the canvas
+    # and make each redraw slower than the last.
+    def __init__(self, canvas, size=PREVIEW_SIZE):
+        self.canvas = canvas
+        self.size = size
+        self.photo = None
+        self.item = canvas.create_image(0, 0, anchor='nw')
+
+    def show(self, img):
+        small, _ = make_proxy(img, self.size)
+        image = Image.fromarray(small)
+        if self.photo is not None and (self.photo.width(), self.photo.height()) == image.size:
+            self.photo.paste(image)
+        else:
+            self.photo = ImageTk.PhotoImage(image)
+            self.canvas.itemconfigure(self.item, image=self.photo)
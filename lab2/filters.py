@@ -0,0 +1,37 @@
+import cv2
+
+import kernels
+
+# Both filters work on each channel independently, so they take RGB or BGR
+# arrays as they are. Passing `out` (same shape and dtype as img) reuses
+# that buffer instead of allocating the result.
+
+# Kernel sizes from which kernels.py beats OpenCV (`python bench.py kernels`); other shapes use OpenCV.
+FAST_PATH_SIZES = {
+    ('sharpen', 'rect'): 11,
+    ('sharpen', 'cross'): 15,
+    ('open', 'rect'): 75,
+    ('open', 'cross'): 75,
+}
+
+
+def use_fast_path(op, shape, size):
+    threshold = FAST_PATH_SIZES.get((op, shape))
+    return threshold is not None and size >= threshold
+
+
+def sharpen_kernel(coefficient, size=3, shape='cross'):
+    kernel = -kernels.structuring_element(shape, size).astype(int)
+    kernel[size // 2, size // 2] = coefficient
+    return kernel
+
+def sharpen(img, coefficient, out=None, size=3, shape='cross'):
+    if use_fast_path('sharpen', shape, size):
+        return kernels.sharpen(img, coefficient, size, shape, out)
+    return cv2.filter2D(img, -1, sharpen_kernel(coefficient, size, shape), dst=out)
+
+def morphological_open(img, size=5, out=None, shape='rect'):
+    if use_fast_path('open', shape, size):
+        return kernels.morphological_open(img, size, shape, out)
+    kernel = kernels.structuring_element(shape, size)
+    return cv2.morphologyEx(img, cv2.MORPH_OPEN, kernel, dst=out)
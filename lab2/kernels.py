@@ -0,0 +1,140 @@
+import cv2
+import numpy as np
+
+# Large-kernel versions of the lab2 filters whose cost per pixel does not
+# grow with the kernel size. Borders behave like OpenCV's defaults
+# (BORDER_REFLECT_101 for linear filters, ignored pixels for morphology),
+# so results match cv2.filter2D / cv2.morphologyEx with the same kernel.
+
+SHAPES = {
+    'rect': cv2.MORPH_RECT,
+    'cross': cv2.MORPH_CROSS,
+    'ellipse': cv2.MORPH_ELLIPSE,
+}
+
+
+def structuring_element(shape, size):
+    return cv2.getStructuringElement(SHAPES[shape], (size, size))
+
+
+def _extreme_value(dtype, op):
+    # Padding that never wins: the dtype max for min, the min for max.
+    if np.issubdtype(dtype, np.integer):
+        info = np.iinfo(dtype)
+    else:
+        info = np.finfo(dtype)
+    return info.max if op is np.minimum else info.min
+
+def running_extreme(img, size, axis, op):
+    # van Herk / Gil-Werman: op (np.minimum or np.maximum) over a window of
+    # `size` along `axis`, centred like OpenCV's anchor, with three
+    # comparisons per pixel whatever the size. The padded axis is cut into
+    # blocks of `size`; any window is a suffix of one block plus a prefix
+    # of the next.
+    if axis == 1:
+        # Scanning rows of a contiguous array is much faster than columns.
+        return cv2.transpose(running_extreme(cv2.transpose(img), size, 0, op))
+    n = img.shape[0]
+    before = size // 2
+    blocks = -(-(n + size - 1) // size)
+    padded = np.full((blocks * size,) + img.shape[1:], _extreme_value(img.dtype, op), dtype=img.dtype)
+    padded[before:before + n] = img
+
+    # Running op within each block, one vectorized call per block row:
+    # much faster than op.accumulate along a middle axis.
+    suffix = padded.reshape(blocks, size, -1)
+    prefix = suffix.copy()
+    for j in range(1, size):
+        op(prefix[:, j - 1], prefix[:, j], out=prefix[:, j])
+    for j in range(size - 2, -1, -1):
+        op(suffix[:, j + 1], suffix[:, j], out=suffix[:, j])
+    suffix = suffix.reshape(padded.shape)
+    prefix = prefix.reshape(padded.shape)
+    return op(suffix[:n], prefix[size - 1:size - 1 + n])
+
+
+def _morph(img, shape, size, op):
+    if shape == 'rect':
+        return running_extreme(running_extreme(img, size, 1, op), size, 0, op)
+    if shape == 'cross':
+        # A cross is the union of a row and a column, so its min/max is the
+        # min/max of the two line results.
+        return op(running_extreme(img, size, 1, op), running_extreme(img, size, 0, op))
+    # No cheap decomposition for other shapes; OpenCV it is.
+    morph = cv2.erode if op is np.minimum else cv2.dilate
+    return morph(img, structuring_element(shape, size))
+
+def erode(img, size, shape='rect'):
+    return _morph(img, shape, size, np.minimum)
+
+def dilate(img, size, shape='rect'):
+    return _morph(img, shape, size, np.maximum)
+
+def morphological_open(img, size, shape='rect', out=None):
+    if shape == 'rect':
+        # Row and column passes of the same op commute, so the opening is
+        # erode columns, erode rows, dilate rows, dilate columns, and both
+        # row passes share one transposed copy.
+        result = running_extreme(img, size, 0, np.minimum)
+        result = cv2.transpose(result)
+        result = running_extreme(result, size, 0, np.minimum)
+        result = running_extreme(result, size, 0, np.maximum)
+        result = cv2.transpose(result)
+        result = running_extreme(result, size, 0, np.maximum)
+    else:
+        result = dilate(erode(img, size, shape), size, shape)
+    if out is None:
+        return result
+    out[...] = result
+    return out
+
+
+def box_sum(img, width, height):
+    # Unnormalized box filter: running sums, O(1) per pixel.
+    return cv2.boxFilter(img, cv2.CV_32S, (width, height), normalize=False)
+
+def fft_filter(img, kernel):
+    # Correlation with an arbitrary kernel through the FFT, like
+    # cv2.filter2D, for kernels too large to apply directly.
+    kh, kw = kernel.shape
+    top, left = kh // 2, kw // 2
+    padded = cv2.copyMakeBorder(img, top, kh - 1 - top, left, kw - 1 - left, cv2.BORDER_REFLECT_101)
+    if padded.ndim == 2:
+        padded = padded[:, :, None]
+    fft_shape = padded.shape[:2]
+    kernel_fft = np.fft.rfft2(kernel[::-1, ::-1], fft_shape)
+    height, width = img.shape[:2]
+    result = np.empty((height, width, padded.shape[2]), dtype=np.float64)
+    for channel in range(padded.shape[2]):
+        full = np.fft.irfft2(np.fft.rfft2(padded[:, :, channel]) * kernel_fft, fft_shape)
+        result[:, :, channel] = full[kh - 1:kh - 1 + height, kw - 1:kw - 1 + width]
+    return result.reshape(img.shape)
+
+
+def _saturate(values, dtype, out=None):
+    info = np.iinfo(dtype)
+    if not np.issubdtype(values.dtype, np.integer):
+        values = np.rint(values)
+    np.clip(values, info.min, info.max, out=values)
+    if out is None:
+        return values.astype(dtype)
+    out[...] = values
+    return out
+
+def sharpen(img, coefficient, size, shape='cross', out=None):
+    # Same as filters.sharpen_kernel: -1 over the shape, `coefficient` in
+    # the centre. So the result is (coefficient + 1) * img minus the sum of
+    # img over the shape, and the sum decomposes into box filters.
+    result = img.astype(np.int32)
+    if shape == 'rect':
+        support = box_sum(img, size, size)
+    elif shape == 'cross':
+        support = box_sum(img, size, 1)
+        support += box_sum(img, 1, size)
+        support -= result
+    else:
+        support = fft_filter(img, structuring_element(shape, size).astype(np.float64))
+        result = result.astype(np.float64)
+    result *= coefficient + 1
+    result -= support
+    return _saturate(result, img.dtype, out)
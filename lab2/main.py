@@ -1,72 +1,165 @@
-import tkinter as tk
-from tkinter import filedialog, messagebox
-from PIL import Image, ImageTk
-import cv2
 import numpy as np
 
+from cache import ImageCache, file_key
+from filters import sharpen, morphological_open
+from preview import BackgroundFilter, make_proxy
+from tiles import sharpen_tiled, morphological_open_tiled
+
+POLL_INTERVAL_MS = 15
+
+FILTERS = {
+    # name: (preview function, full-resolution function)
+    "sharpen": (sharpen, sharpen_tiled),
+    "open": (morphological_open, morphological_open_tiled),
+}
+KERNEL_SHAPES = ("rect", "cross", "ellipse")
+MAX_KERNEL_RADIUS = 25
+
+# (size, shape) of each filter's kernel. The kernel controls show and
+# change the settings of the filter on screen.
+kernel_settings = {"sharpen": (3, "cross"), "open": (5, "rect")}
+
 def load_image():
     file_path = filedialog.askopenfilename()
     if file_path:
         try:
-            global img
-            img = Image.open(file_path)
-            display_image(img)
+            global img_array, source_key, proxy, proxy_scale, current_filter
+            # Decoded once into a contiguous RGB array; the filters and the
+            # display all work from it without further copies.
+            source_key = file_key(file_path)
+            img_array = cache.get_or_compute((source_key, "source"),
+                                             lambda: np.array(Image.open(file_path).convert("RGB")))
+            proxy, proxy_scale = make_proxy(img_array)
+            current_filter = None
+            background.cancel()
+            display_image(img_array)
             btn_sharpen.config(state=tk.NORMAL)
             btn_morph.config(state=tk.NORMAL)
         except Exception as e:
             messagebox.showerror("Error", f"Невозможно открыть: {e}")
 
-def display_image(image):
-    image = image.copy()
-    image.thumbnail((400, 400))
-    img_tk = ImageTk.PhotoImage(image)
-    canvas.create_image(0, 0, anchor='nw', image=img_tk)
-    canvas.image = img_tk
+def display_image(img):
+    display.show(img)
 
-def sharpen_image():
-    if img is None:
+def filter_params(name):
+    size, shape = kernel_settings[name]
+    params = {"size": size, "shape": shape}
+    if name == "sharpen":
+        params["coefficient"] = sharpness_slider.get()
+    return params
+
+def run_filter(name):
+    # Shows a cached full-resolution result if there is one. Otherwise
+    # shows the filter applied to the display-sized proxy right away and
+    # computes the full-resolution result in the background; a newer call
+    # cancels the pending one.
+    global current_filter, pending_key
+    if img_array is None:
         messagebox.showerror("Error", "Нет такого изображения")
         return
 
-    sharpness_coefficient = sharpness_slider.get()
-    kernel = np.array([[0, -1, 0], [-1, sharpness_coefficient, -1], [0, -1, 0]])
-    
-    img_cv = cv2.cvtColor(np.array(img), cv2.COLOR_RGB2BGR)
-    sharpened = cv2.filter2D(img_cv, -1, kernel)
-    result = Image.fromarray(cv2.cvtColor(sharpened, cv2.COLOR_BGR2RGB))
-    display_image(result)
+    if name != current_filter:
+        current_filter = name
+        size, shape = kernel_settings[name]
+        kernel_radius_slider.set(size // 2)
+        kernel_shape.set(shape)
+    params = filter_params(name)
+    key = (source_key, name, tuple(sorted(params.items())))
+    preview_filter, full_filter = FILTERS[name]
+
+    result = cache.get(key)
+    if result is not None:
+        background.cancel()
+        display_image(result)
+        return
+
+    # The proxy is about 1 / proxy_scale the size of the image, so its
+    # kernel shrinks with it to look like the full-resolution result.
+    proxy_params = dict(params, size=max(3, 2 * round(params["size"] // 2 * proxy_scale) + 1))
+    display_image(preview_filter(proxy, **proxy_params))
+    pending_key = key
+    background.submit(full_filter, img_array, **params)
+
+def sharpen_image():
+    run_filter("sharpen")
 
 def morphological_processing():
-    if img is None:
-        messagebox.showerror("Error", "Нет такого изображения")
+    run_filter("open")
+
+def on_sharpness_change(value):
+    if current_filter == "sharpen":
+        run_filter("sharpen")
+
+def on_kernel_change(value=None):
+    # Also called when run_filter shows another filter's settings; those
+    # are unchanged, so nothing is re-run.
+    if current_filter is None:
         return
+    setting = (2 * kernel_radius_slider.get() + 1, kernel_shape.get())
+    if setting != kernel_settings[current_filter]:
+        kernel_settings[current_filter] = setting
+        run_filter(current_filter)
+
+def poll_background():
+    # Always reschedules, so a failed filter does not stop later results
+    # from showing.
+    try:
+        result = background.take_result()
+        if result is not None:
+            cache.put(pending_key, result)
+            display_image(result)
+    except Exception as e:
+        messagebox.showerror("Error", f"Ошибка фильтра: {e}")
+    finally:
+        app.after(POLL_INTERVAL_MS, poll_background)
+
+if __name__ == "__main__":
+    import tkinter as tk
+    from tkinter import filedialog, messagebox
+    from PIL import Image
+
+    from display import DisplaySurface
 
-    img_cv = cv2.cvtColor(np.array(img), cv2.COLOR_RGB2BGR)
-    kernel = np.ones((5, 5), np.uint8)
-    morph = cv2.morphologyEx(img_cv, cv2.MORPH_OPEN, kernel)
-    result = Image.fromarray(cv2.cvtColor(morph, cv2.COLOR_BGR2RGB))
-    display_image(result)
+    app = tk.Tk()
+    app.title("Лаба 2")
 
-app = tk.Tk()
-app.title("Лаба 2")
+    canvas = tk.Canvas(app, width=400, height=400)
+    canvas.pack()
+    display = DisplaySurface(canvas)
 
-canvas = tk.Canvas(app, width=400, height=400)
-canvas.pack()
+    btn_load = tk.Button(app, text="Загрузить изображение", command=load_image)
+    btn_load.pack(side=tk.LEFT)
 
-btn_load = tk.Button(app, text="Загрузить изображение", command=load_image)
-btn_load.pack(side=tk.LEFT)
+    btn_sharpen = tk.Button(app, text="Шарпэн", command=sharpen_image)
+    btn_sharpen.pack(side=tk.LEFT)
 
-btn_sharpen = tk.Button(app, text="Шарпэн", command=sharpen_image)
-btn_sharpen.pack(side=tk.LEFT)
+    btn_morph = tk.Button(app, text="Фильтрация", command=morphological_processing)
+    btn_morph.pack(side=tk.LEFT)
 
-btn_morph = tk.Button(app, text="Фильтрация", command=morphological_processing)
-btn_morph.pack(side=tk.LEFT)
+    # Slider for sharpness coefficient
+    sharpness_slider = tk.Scale(app, from_=4, to=12, orient=tk.HORIZONTAL, label="Sharp coef",
+                                command=on_sharpness_change)
+    sharpness_slider.set(5)  # Default value
+    sharpness_slider.pack()
 
-# Slider for sharpness coefficient
-sharpness_slider = tk.Scale(app, from_=4, to=12, orient=tk.HORIZONTAL, label="Sharp coef")
-sharpness_slider.set(5)  # Default value
-sharpness_slider.pack()
+    # Kernel of the filter on screen: size 2 * radius + 1, up to 51 px.
+    kernel_radius_slider = tk.Scale(app, from_=1, to=MAX_KERNEL_RADIUS, orient=tk.HORIZONTAL, label="Kernel radius",
+                                    command=on_kernel_change)
+    kernel_radius_slider.set(1)
+    kernel_radius_slider.pack()
+    kernel_shape = tk.StringVar(app, "cross")
+    kernel_shape_menu = tk.OptionMenu(app, kernel_shape, *KERNEL_SHAPES, command=on_kernel_change)
+    kernel_shape_menu.pack()
 
-img = None
+    img_array = None
+    source_key = None
+    proxy = None
+    proxy_scale = 1.0
+    pending_key = None
+    current_filter = None
+    cache = ImageCache()
+    background = BackgroundFilter()
+    app.after(POLL_INTERVAL_MS, poll_background)
 
-app.mainloop()
\ No newline at end of file
+    app.mainloop()
+    background.shutdown()
\ No newline at end of file
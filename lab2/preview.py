@@ -0,0 +1,54 @@
+import threading
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+import cv2
+
+PREVIEW_SIZE = (400, 400)
+
+
+def make_proxy(img, size=PREVIEW_SIZE):
+    # Area-averaged copy of img that fits in size, for instant previews,
+    # and the scale from img to the copy.
+    height, width = img.shape[:2]
+    scale = min(size[0] / width, size[1] / height)
+    if scale >= 1:
+        return img, 1.0
+    proxy_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return cv2.resize(img, proxy_size, interpolation=cv2.INTER_AREA), scale
+
+
+class BackgroundFilter:
+    # Runs one full-resolution filter at a time on a worker thread. A new
+    # submit() cancels the previous job: it is dropped if it has not
+    # started yet, otherwise it stops at the next tile (the function gets a
+    # `cancel` event). Results are collected by polling take_result() from
+    # the GUI thread.
+    def __init__(self):
+        self._pool = ThreadPoolExecutor(1)
+        self._future = None
+        self._cancel = None
+
+    def submit(self, func, *args, **kwargs):
+        self.cancel()
+        self._cancel = threading.Event()
+        self._future = self._pool.submit(func, *args, cancel=self._cancel, **kwargs)
+
+    def cancel(self):
+        if self._future is not None:
+            self._cancel.set()
+            self._future.cancel()
+            self._future = None
+
+    def take_result(self):
+        future = self._future
+        if future is None or not future.done():
+            return None
+        self._future = None
+        try:
+            return future.result()
+        except CancelledError:
+            return None
+
+    def shutdown(self):
+        self.cancel()
+        self._pool.shutdown(wait=False)
@@ -0,0 +1,126 @@
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from functools import partial
+
+import numpy as np
+from PIL import Image
+
+from filters import sharpen, morphological_open
+
+DEFAULT_STRIP_ROWS = 64
+CHANNELS = {'L': 1, 'RGB': 3, 'RGBA': 4}
+
+
+def filter_streaming(func, src, dst, halo, strip_rows=DEFAULT_STRIP_ROWS):
+    # Filters src into dst strip by strip. Only a rolling buffer of
+    # strip_rows + 2 * halo rows is held in memory: the halo rows shared by
+    # neighbouring strips are shifted to the top of the buffer instead of
+    # being read again, and each source row is read once. With memory-mapped
+    # src and dst, peak memory is about width x (strip_rows + kernel height),
+    # whatever the image height. func must accept `out=`.
+    height = src.shape[0]
+    buffer = np.empty((strip_rows + 2 * halo,) + src.shape[1:], dtype=src.dtype)
+    result = np.empty_like(buffer)
+    buf_start = buf_stop = 0
+
+    for out_start in range(0, height, strip_rows):
+        out_stop = min(out_start + strip_rows, height)
+        need_start = max(out_start - halo, 0)
+        need_stop = min(out_stop + halo, height)
+
+        keep = max(buf_stop - need_start, 0)
+        if keep:
+            buffer[:keep] = buffer[need_start - buf_start:buf_stop - buf_start]
+        buffer[keep:need_stop - need_start] = src[need_start + keep:need_stop]
+        buf_start, buf_stop = need_start, need_stop
+
+        rows = need_stop - need_start
+        func(buffer[:rows], out=result[:rows])
+        dst[out_start:out_stop] = result[out_start - need_start:out_stop - need_start]
+
+
+def open_source(path, shape=None, dtype='uint8'):
+    # Memory-maps the pixels where the file layout allows it: .npy, raw
+    # files (shape given) and uncompressed top-down PPM/PGM/TIFF. Anything
+    # else, e.g. JPEG, has to be decoded whole.
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.npy':
+        return np.load(path, mmap_mode='r')
+    if shape is not None:
+        return np.memmap(path, dtype=dtype, mode='r', shape=tuple(shape))
+
+    with Image.open(path) as img:
+        if len(img.tile) == 1 and img.mode in CHANNELS:
+            codec, extents, offset, args = img.tile[0]
+            rawmode, stride, orientation = (args, 0, 1) if isinstance(args, str) else (tuple(args) + (0, 1))[:3]
+            width, height = img.size
+            channels = CHANNELS[img.mode]
+            if (codec == 'raw' and tuple(extents) == (0, 0, width, height) and rawmode == img.mode
+                    and stride in (0, width * channels) and orientation == 1):
+                shape = (height, width, channels) if channels > 1 else (height, width)
+                return np.memmap(path, dtype=np.uint8, mode='r', offset=offset, shape=shape)
+        return np.asarray(img)
+
+
+def create_output(path, shape, dtype):
+    # Memory-mapped output: .npy, .ppm/.pgm (uint8 only) or a raw file.
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.npy':
+        return np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=shape)
+    header = b''
+    if ext in ('.ppm', '.pgm'):
+        # P6 holds RGB and P5 grey; anything else, e.g. RGBA, would be
+        # written as bytes the header does not describe.
+        channels = shape[2] if len(shape) == 3 else 1
+        if channels not in (1, 3) or np.dtype(dtype) != np.uint8:
+            raise ValueError(f'{ext} output needs uint8 grey or RGB pixels, '
+                             f'not {channels} channels of {np.dtype(dtype)}')
+        magic = b'P6' if channels == 3 else b'P5'
+        header = b'%s\n%d %d\n255\n' % (magic, shape[1], shape[0])
+    with open(path, 'wb') as f:
+        f.write(header)
+        f.truncate(len(header) + int(np.prod(shape)) * np.dtype(dtype).itemsize)
+    return np.memmap(path, dtype=dtype, mode='r+', offset=len(header), shape=shape)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Filter an image strip by strip with bounded memory.')
+    parser.add_argument('input', help='.npy, raw (with --raw-shape), uncompressed PPM/PGM/TIFF, or any PIL format')
+    parser.add_argument('output', help='.npy, .ppm/.pgm or raw output, written through a memory map')
+    parser.add_argument('--op', choices=['sharpen', 'open'], default='sharpen')
+    parser.add_argument('--coefficient', type=int, default=5)
+    parser.add_argument('--size', type=int, help='kernel size (default 3 for sharpen, 5 for open)')
+    parser.add_argument('--shape', choices=['rect', 'cross', 'ellipse'])
+    parser.add_argument('--strip-rows', type=int, default=DEFAULT_STRIP_ROWS)
+    parser.add_argument('--raw-shape', type=int, nargs='+', metavar='N', help='height width [channels] of a raw input')
+    parser.add_argument('--raw-dtype', default='uint8')
+    args = parser.parse_args()
+
+    if args.op == 'sharpen':
+        size = args.size or 3
+        func = partial(sharpen, coefficient=args.coefficient, size=size, shape=args.shape or 'cross')
+        halo = size // 2
+    else:
+        size = args.size or 5
+        func = partial(morphological_open, size=size, shape=args.shape or 'rect')
+        halo = 2 * (size // 2)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    src = open_source(args.input, args.raw_shape, args.raw_dtype)
+    dst = create_output(args.output, src.shape, src.dtype)
+    filter_streaming(func, src, dst, halo, args.strip_rows)
+    dst.flush()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    print(f'{src.shape[1]}x{src.shape[0]} in {elapsed:.2f} s, {src.nbytes / 1e6 / elapsed:.1f} MB/s; '
+          f'image {src.nbytes / 1e6:.1f} MB, peak allocations {peak / 1e6:.1f} MB', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+import os
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from functools import partial
+
+import numpy as np
+
+from filters import sharpen, morphological_open
+
+DEFAULT_TILE_SIZE = 512
+
+
+def tile_slices(height, width, tile_size, halo):
+    # For each tile yields (source, target, inner): source is the tile grown
+    # by `halo` on every side (clipped to the image), target is where the
+    # tile goes in the output and inner is the same area inside source.
+    for top in range(0, height, tile_size):
+        bottom = min(top + tile_size, height)
+        src_top = max(top - halo, 0)
+        src_bottom = min(bottom + halo, height)
+        for left in range(0, width, tile_size):
+            right = min(left + tile_size, width)
+            src_left = max(left - halo, 0)
+            src_right = min(right + halo, width)
+            yield (
+                (slice(src_top, src_bottom), slice(src_left, src_right)),
+                (slice(top, bottom), slice(left, right)),
+                (slice(top - src_top, bottom - src_top), slice(left - src_left, right - src_left)),
+            )
+
+
+def filter_tiled(func, img, halo, tile_size=DEFAULT_TILE_SIZE, workers=None, cancel=None, out=None):
+    # Runs func (a shape-preserving filter) over overlapping tiles on a
+    # thread pool; OpenCV releases the GIL, so tiles run in parallel. As
+    # long as halo covers the filter's reach, the result matches func(img).
+    # Setting the optional cancel event skips the remaining tiles and
+    # raises CancelledError.
+    if out is None:
+        out = np.empty_like(img)
+
+    def process(tile):
+        if cancel is not None and cancel.is_set():
+            return
+        source, target, inner = tile
+        out[target] = func(img[source])[inner]
+
+    tiles = list(tile_slices(img.shape[0], img.shape[1], tile_size, halo))
+    with ThreadPoolExecutor(workers or os.cpu_count()) as pool:
+        for _ in pool.map(process, tiles):
+            pass
+    if cancel is not None and cancel.is_set():
+        raise CancelledError()
+    return out
+
+
+def sharpen_tiled(img, coefficient, tile_size=DEFAULT_TILE_SIZE, workers=None, cancel=None, out=None,
+                  size=3, shape='cross'):
+    func = partial(sharpen, coefficient=coefficient, size=size, shape=shape)
+    return filter_tiled(func, img, size // 2, tile_size, workers, cancel, out)
+
+def morphological_open_tiled(img, size=5, tile_size=DEFAULT_TILE_SIZE, workers=None, cancel=None, out=None,
+                             shape='rect'):
+    # Opening is an erosion followed by a dilation, so it reaches twice the
+    # kernel radius.
+    func = partial(morphological_open, size=size, shape=shape)
+    return filter_tiled(func, img, 2 * (size // 2), tile_size, workers, cancel, out)
@@ -0,0 +1,236 @@
+import numpy as np
+
+from raster import FIXED_HALF, FIXED_SHIFT, check_fixed_steps
+
+
+def segments_array(segments):
+    # (N, 4) int64 rows of x0, y0, x1, y1.
+    return np.asarray(segments, dtype=np.int64).reshape(-1, 4)
+
+def bresenham_lines(segments, steps=None):
+    # Rasterizes N segments (x0, y0, x1, y1) at once. Pixels of segment i are
+    # coords[offsets[i]:offsets[i + 1]], in the same order bresenham_line
+    # returns them. steps, an (N, 2) array of [start, stop) major-axis
+    # steps, limits each segment to part of its pixels (see clip.py).
+    x0, y0, x1, y1 = segments_array(segments).T
+    dx = np.abs(x1 - x0)
+    dy = np.abs(y1 - y0)
+    sx = np.where(x0 < x1, 1, -1)
+    sy = np.where(y0 < y1, 1, -1)
+    major = np.maximum(dx, dy)
+    minor = np.minimum(dx, dy)
+    if steps is None:
+        first = np.zeros_like(major)
+        counts = major + 1
+    else:
+        first, stop = np.asarray(steps, dtype=np.int64).reshape(-1, 2).T
+        counts = np.maximum(stop - first, 0)
+
+    offsets = np.zeros(len(x0) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    seg = np.repeat(np.arange(len(x0)), counts)
+    step = np.arange(offsets[-1]) - offsets[seg] + first[seg]
+
+    # bresenham_line moves along the major axis every step and along the
+    # minor one when the error term crosses half a pixel; ties go down.
+    seg_major = np.maximum(major, 1)[seg]
+    minor_step = (2 * minor[seg] * step + seg_major - 1) // (2 * seg_major)
+    x_major = (dx >= dy)[seg]
+
+    coords = np.empty((len(step), 2), dtype=np.int32)
+    coords[:, 0] = x0[seg] + sx[seg] * np.where(x_major, step, minor_step)
+    coords[:, 1] = y0[seg] + sy[seg] * np.where(x_major, minor_step, step)
+    return coords, offsets
+
+
+def wu_lines(segments, steps=None):
+    # Anti-aliased version of bresenham_lines, with raster.wu_line's cells
+    # and coverage: returns (coords, coverage, offsets). Every major-axis
+    # step gives the cell below the exact minor coordinate and, unless it
+    # is a whole number, the cell above it. steps limits each segment to
+    # part of its major-axis steps, as in bresenham_lines.
+    x0, y0, x1, y1 = segments_array(segments).T
+    dx = np.abs(x1 - x0)
+    dy = np.abs(y1 - y0)
+    sx = np.where(x0 < x1, 1, -1)
+    sy = np.where(y0 < y1, 1, -1)
+    major = np.maximum(dx, dy)
+    minor = np.minimum(dx, dy)
+    if steps is None:
+        first = np.zeros_like(major)
+        counts = major + 1
+    else:
+        first, stop = np.asarray(steps, dtype=np.int64).reshape(-1, 2).T
+        counts = np.maximum(stop - first, 0)
+
+    seg = np.repeat(np.arange(len(x0)), counts)
+    step = np.arange(len(seg)) - np.repeat(np.cumsum(counts) - counts, counts) + first[seg]
+    seg_major = np.maximum(major, 1)[seg]
+    base, error = np.divmod(minor[seg] * step, seg_major)
+
+    # Both candidate cells of every step side by side, then the upper ones
+    # with no coverage dropped.
+    fraction = (error / seg_major).astype(np.float32)
+    coverage = np.stack((1 - fraction, fraction), axis=1)
+    keep = coverage > 0
+    cell = (base[:, None] + np.array([0, 1]))[keep]
+    step = np.broadcast_to(step[:, None], keep.shape)[keep]
+    seg = np.broadcast_to(seg[:, None], keep.shape)[keep]
+    x_major = (dx >= dy)[seg]
+
+    coords = np.empty((len(step), 2), dtype=np.int32)
+    coords[:, 0] = x0[seg] + sx[seg] * np.where(x_major, step, cell)
+    coords[:, 1] = y0[seg] + sy[seg] * np.where(x_major, cell, step)
+    offsets = np.zeros(len(x0) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(seg, minlength=len(x0)), out=offsets[1:])
+    return coords, coverage[keep], offsets
+
+
+def step_by_step_line(x0, y0, x1, y1):
+    # Same pixels as step_by_step, as an (M, 2) array.
+    if x0 == x1:
+        ys = np.arange(min(y0, y1), max(y0, y1) + 1)
+        return np.stack((np.full_like(ys, x0), ys), axis=1).astype(np.int32)
+
+    dx = x1 - x0
+    dy = y1 - y0
+    k = dy / dx
+    b = y0 - k * x0
+    step = 1 / max(abs(dx), abs(dy))
+    n = abs(dx) * max(abs(dx), abs(dy)) + 2
+    # np.add.accumulate adds sequentially, like the x += step loop
+    xs = np.add.accumulate(np.r_[float(x0), np.full(n - 1, step if dx > 0 else -step)])
+    xs = xs[xs <= x1] if dx > 0 else xs[xs >= x1]
+    ys = k * xs + b
+    return np.stack((np.rint(xs), np.rint(ys)), axis=1).astype(np.int32)
+
+def dda_line(x0, y0, x1, y1):
+    # Same pixels as dda_algorithm, as an (M, 2) array; a zero-length
+    # segment gives its single point instead of dividing by zero.
+    dx, dy = x1 - x0, y1 - y0
+    steps = max(abs(dx), abs(dy))
+    if steps == 0:
+        return np.array([[x0, y0]], dtype=np.int32)
+    xs = np.add.accumulate(np.r_[float(x0), np.full(steps, dx / steps)])
+    ys = np.add.accumulate(np.r_[float(y0), np.full(steps, dy / steps)])
+    return np.stack((np.rint(xs), np.rint(ys)), axis=1).astype(np.int32)
+
+def fixed_line(x0, y0, x1, y1):
+    # Same pixels as raster.dda_fixed and raster.step_by_step_fixed, as an
+    # (M, 2) array: the 16.16 minor coordinate of every step at once.
+    dx, dy = x1 - x0, y1 - y0
+    steps = max(abs(dx), abs(dy))
+    check_fixed_steps(steps)
+    if steps == 0:
+        return np.array([[x0, y0]], dtype=np.int32)
+    x_major = abs(dx) >= abs(dy)
+    major = np.arange(steps + 1, dtype=np.int64)
+    minor = abs(dy if x_major else dx)
+    position = (major * minor << FIXED_SHIFT) // steps
+    offset = (position + FIXED_HALF - 1) >> FIXED_SHIFT
+    major *= 1 if (dx if x_major else dy) > 0 else -1
+    offset *= 1 if (dy if x_major else dx) > 0 else -1
+    xs, ys = (major, offset) if x_major else (offset, major)
+    return np.stack((xs + x0, ys + y0), axis=1).astype(np.int32)
+
+def _circle_octant(r):
+    # Octant 0 of the midpoint circle for every radius in r: (seg, x, y)
+    # with 0 <= y <= x. With d = 1 - r the loop steps x down exactly
+    # when x * (x - 1) >= r * r - y * y, so past row 0 x is the largest
+    # integer with x * (x - 1) < r * r - y * y and each row has a closed
+    # form.
+    r = np.asarray(r, dtype=np.int64)
+    rows = (r / np.sqrt(2)).astype(np.int64) + 2
+    seg = np.repeat(np.arange(len(r)), rows)
+    y = np.arange(len(seg)) - np.repeat(np.cumsum(rows) - rows, rows)
+    x = octant_x(r[seg], y)
+    inside = (x >= y) & (y <= r[seg])
+    return seg[inside], x[inside], y[inside]
+
+def octant_x(r, y):
+    # x of the octant 0 pixel on row y (see _circle_octant), for any rows.
+    limit = r * r - y * y
+    x = np.floor((1 + np.sqrt(np.maximum(4 * limit - 3, 0))) / 2).astype(np.int64)
+    # Guard against sqrt rounding for large radii.
+    x -= x * (x - 1) >= limit
+    x += (x + 1) * x < limit
+    return np.where(y == 0, r, x)
+
+def circles_points(circles):
+    # Rasterizes N circles (xc, yc, r) at once, like bresenham_lines. Each
+    # circle has the pixels of bresenham_circle, but every pixel once: the
+    # octant boundaries (x == y, y == 0) are not mirrored onto themselves.
+    xc, yc, r = np.asarray(circles, dtype=np.int64).reshape(-1, 3).T
+    seg, a, b = _circle_octant(r)
+
+    # Quadrant x > 0, y >= 0 is the octant plus its mirror in x == y, minus
+    # the diagonal and (0, r); rotating it by 90 degrees three times
+    # covers the rest of the circle exactly once.
+    mirror = (a != b) & (b > 0)
+    order = np.argsort(np.concatenate((seg, seg[mirror])), kind='stable')
+    seg = np.concatenate((seg, seg[mirror]))[order]
+    qx = np.concatenate((a, b[mirror]))[order]
+    qy = np.concatenate((b, a[mirror]))[order]
+
+    xs = np.stack((qx, -qy, -qx, qy), axis=1) + xc[seg, None]
+    ys = np.stack((qy, qx, -qy, -qx), axis=1) + yc[seg, None]
+    # r == 0 is the centre alone; its rotations are the same pixel.
+    keep = np.ones(xs.shape, dtype=bool)
+    keep[:, 1:] = (qx != 0)[:, None]
+
+    offsets = np.zeros(len(r) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(np.broadcast_to(seg[:, None], keep.shape)[keep], minlength=len(r)), out=offsets[1:])
+    coords = np.stack((xs[keep], ys[keep]), axis=1).astype(np.int32)
+    return coords, offsets
+
+def circle_points(xc, yc, r):
+    # Same pixels as bresenham_circle, each once, as an (M, 2) array.
+    return circles_points([(xc, yc, r)])[0]
+
+def disk_spans(xc, yc, r):
+    # Filled disk bounded by circle_points, as (y, x_start, x_end) rows,
+    # ends inclusive.
+    _, a, b = _circle_octant([r])
+    half = np.zeros(r + 1, dtype=np.int64)
+    np.maximum.at(half, b, a)
+    np.maximum.at(half, a, b)
+    dy = np.arange(-r, r + 1)
+    half = half[np.abs(dy)]
+    return np.stack((yc + dy, xc - half, xc + half), axis=1).astype(np.int32)
+
+def _nearest_offsets(steps, a, b):
+    # For each step t along one semi-axis (length a) of the ellipse, the
+    # offset along the other (length b) nearest the curve: the smallest u
+    # whose midpoint u + 1/2 lies outside, 4 b^2 t^2 + a^2 (2u + 1)^2 >= 4 a^2 b^2.
+    a2, b2 = a * a, b * b
+    u = np.ceil(b * np.sqrt(np.maximum(1 - (steps / a) ** 2, 0)) - 0.5).astype(np.int64)
+    u = np.maximum(u, 0)
+    u -= (u > 0) & (4 * b2 * steps * steps + a2 * (2 * u - 1) ** 2 >= 4 * a2 * b2)
+    u += 4 * b2 * steps * steps + a2 * (2 * u + 1) ** 2 < 4 * a2 * b2
+    return u
+
+def ellipse_points(xc, yc, rx, ry):
+    # Midpoint ellipse with semi-axes rx, ry, each pixel once. Where the
+    # curve's slope is under 1 it steps x and takes the row nearest the
+    # curve, beyond that it steps y and takes the nearest column. The
+    # midpoint tests have closed forms, so both regions are arrays.
+    if rx == 0 or ry == 0:
+        xs, ys = np.meshgrid(np.arange(-rx, rx + 1), np.arange(-ry, ry + 1))
+        return np.stack((xs.ravel() + xc, ys.ravel() + yc), axis=1).astype(np.int32)
+
+    # The slope is 1 at x = rx^2 / sqrt(rx^2 + ry^2). Region 2 starts on
+    # the last row of region 1: the nearest column there can be one right
+    # of where region 1 stopped, and leaving it out would open a gap.
+    x1 = np.arange(int(np.ceil(rx * rx / np.sqrt(rx * rx + ry * ry))), dtype=np.int64)
+    y1 = _nearest_offsets(x1, rx, ry)
+    y2 = np.arange(y1[-1] + 1, dtype=np.int64)
+    x2 = _nearest_offsets(y2, ry, rx)
+    # Otherwise region 1 already has that row's pixel.
+    new = (y2 < y1[-1]) | (x2 > x1[-1])
+    qx = np.concatenate((x1, x2[new]))
+    qy = np.concatenate((y1, y2[new]))
+
+    # Mirror the quadrant; points on an axis are not mirrored onto themselves.
+    xs = np.concatenate((qx, -qx[qx > 0], qx[qy > 0], -qx[(qx > 0) & (qy > 0)]))
+    ys = np.concatenate((qy, qy[qx > 0], -qy[qy > 0], -qy[(qx > 0) & (qy > 0)]))
+    return np.stack((xs + xc, ys + yc), axis=1).astype(np.int32)
@@ -0,0 +1,492 @@
+import argparse
+import csv
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+
+from batch import bresenham_lines, circle_points, circles_points, dda_line, wu_lines
+from clip import clipped_bresenham_lines, clipped_circles_points, clipped_dda_line
+from framebuffer import new_framebuffer, plot
+from parallel import render_parallel, render_serial
+from raster import (step_by_step, dda_algorithm, bresenham_line, bresenham_circle, dda_fixed, step_by_step_fixed,
+                    wu_line)
+from scene import random_scene
+from spatial import ShapeIndex
+
+# name -> (function, kind); line and aa_line functions take (x0, y0,
+# x1, y1), circle functions (xc, yc, r). All return the rasterized pixels,
+# aa_line ones as (x, y, coverage), so equivalence() leaves them out.
+ALGORITHMS = {
+    'step_by_step': (step_by_step, 'line'),
+    'dda': (dda_algorithm, 'line'),
+    'bresenham': (bresenham_line, 'line'),
+    'dda_fixed': (dda_fixed, 'line'),
+    'step_by_step_fixed': (step_by_step_fixed, 'line'),
+    'wu': (wu_line, 'aa_line'),
+    'bresenham_circle': (bresenham_circle, 'circle'),
+    'midpoint_circle': (circle_points, 'circle'),
+}
+
+DEFAULT_LENGTHS = (8, 32, 128)
+DEFAULT_SLOPES = (0.0, 0.25, 0.5, 1.0)
+DEFAULT_RADII = (4, 16, 64, 256)
+
+FIELDS = ['algorithm', 'size', 'octant', 'slope', 'pixels', 'calls_per_trial', 'trials',
+          'median_ns', 'p95_ns', 'mean_ns', 'stdev_ns', 'pixels_per_sec']
+
+
+def octant_segment(length, slope, octant):
+    # Segment from the origin whose major axis is `length` long, with
+    # |minor / major| == slope, mirrored into octant 0..7 (counter-clockwise
+    # from +x).
+    major = length
+    minor = round(length * slope)
+    dx, dy = (major, minor) if octant in (0, 3, 4, 7) else (minor, major)
+    if octant in (2, 3, 4, 5):
+        dx = -dx
+    if octant in (4, 5, 6, 7):
+        dy = -dy
+    return 0, 0, dx, dy
+
+
+def line_cases(lengths, slopes):
+    for length in lengths:
+        for octant in range(8):
+            for slope in slopes:
+                yield {'size': length, 'octant': octant, 'slope': slope}, octant_segment(length, slope, octant)
+
+def circle_cases(radii):
+    for r in radii:
+        yield {'size': r, 'octant': '', 'slope': ''}, (0, 0, r)
+
+
+def time_call(func, args, warmup=3, trials=20, min_trial_ns=200_000):
+    # Returns per-call times in ns, one per trial. Each trial repeats the
+    # call enough times to last at least min_trial_ns so that timer
+    # resolution does not dominate short calls.
+    for _ in range(warmup):
+        func(*args)
+
+    number = 1
+    while True:
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            func(*args)
+        elapsed = time.perf_counter_ns() - start
+        if elapsed >= min_trial_ns:
+            break
+        number *= 2
+
+    samples = []
+    for _ in range(trials):
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            func(*args)
+        samples.append((time.perf_counter_ns() - start) / number)
+    return samples, number
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    return {
+        'median_ns': statistics.median(ordered),
+        'p95_ns': p95,
+        'mean_ns': statistics.fmean(ordered),
+        'stdev_ns': statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+    }
+
+
+def run(algorithms, lengths=DEFAULT_LENGTHS, slopes=DEFAULT_SLOPES, radii=DEFAULT_RADII,
+        warmup=3, trials=20, min_trial_ns=200_000):
+    results = []
+    for name in algorithms:
+        func, kind = ALGORITHMS[name]
+        cases = circle_cases(radii) if kind == 'circle' else line_cases(lengths, slopes)
+        for params, args in cases:
+            pixels = len(func(*args))
+            samples, number = time_call(func, args, warmup, trials, min_trial_ns)
+            row = {'algorithm': name, **params, 'pixels': pixels,
+                   'calls_per_trial': number, 'trials': trials, **summarize(samples)}
+            row['pixels_per_sec'] = pixels / (row['median_ns'] / 1e9)
+            results.append(row)
+    return results
+
+
+def ring_segments(length):
+    # Segments from the origin to every point at Chebyshev distance
+    # `length`: every slope a segment of that length can have, in all
+    # octants.
+    for i in range(-length, length):
+        yield 0, 0, i, -length
+        yield 0, 0, length, i
+        yield 0, 0, -i, length
+        yield 0, 0, -length, -i
+
+def equivalence(algorithms, lengths=DEFAULT_LENGTHS):
+    # Per line algorithm and length: segments whose pixel list equals
+    # bresenham_line's, segments with the same pixel set (repeats aside),
+    # pixels off Bresenham's, and segments with more than one pixel per
+    # major-axis step.
+    rows = []
+    for name in algorithms:
+        func, kind = ALGORITHMS[name]
+        if kind != 'line':
+            continue
+        for length in lengths:
+            row = {'algorithm': name, 'size': length, 'segments': 0, 'identical': 0,
+                   'same_pixels': 0, 'wrong_pixels': 0, 'extra_samples': 0}
+            for segment in ring_segments(length):
+                reference = bresenham_line(*segment)
+                points = func(*segment)
+                row['segments'] += 1
+                row['identical'] += points == reference
+                row['same_pixels'] += set(points) == set(reference)
+                row['wrong_pixels'] += len(set(points) - set(reference))
+                row['extra_samples'] += len(points) > length + 1
+            rows.append(row)
+    return rows
+
+def print_equivalence(rows):
+    print(f'{"algorithm":<20}{"size":>6}{"segments":>10}{"identical":>11}{"same set":>10}'
+          f'{"wrong px":>10}{"oversampled":>13}')
+    for row in rows:
+        print(f'{row["algorithm"]:<20}{row["size"]:>6}{row["segments"]:>10}{row["identical"]:>11}'
+              f'{row["same_pixels"]:>10}{row["wrong_pixels"]:>10}{row["extra_samples"]:>13}')
+
+
+def wu_image(segment, shape):
+    coords, coverage, _ = wu_lines([segment])
+    image = np.zeros(shape)
+    np.maximum.at(image, (coords[:, 1], coords[:, 0]), coverage)
+    return image
+
+# The anti-aliasing comparison uses octant 0 segments (x-major, going
+# right and down), which keeps the ideal line simple to sample.
+
+def supersampled_image(segment, shape, factor):
+    # A one-cell-wide line the way it is done without Wu: `factor`
+    # Bresenham lines side by side at `factor` times the resolution, then
+    # each factor x factor block averaged into one cell.
+    x0, y0, x1, y1 = segment
+    slope = (y1 - y0) / max(x1 - x0, 1)
+    centre = (factor - 1) / 2
+    start, stop = x0 * factor, x1 * factor + factor - 1
+    sub = [(start, round(y0 * factor + k + slope * (start - x0 * factor - centre)),
+            stop, round(y0 * factor + k + slope * (stop - x0 * factor - centre))) for k in range(factor)]
+    coords, _ = bresenham_lines(sub)
+    height, width = shape
+    image = np.zeros((height * factor, width * factor))
+    image[coords[:, 1], coords[:, 0]] = 1
+    return image.reshape(height, factor, width, factor).mean(axis=(1, 3))
+
+def reference_image(segment, shape, samples=16):
+    # Coverage of the ideal line one cell wide along y, from x0 - 1/2 to
+    # x1 + 1/2, from samples x samples points per cell. Cell (x, y) spans
+    # x +- 1/2, y +- 1/2.
+    x0, y0, x1, y1 = segment
+    height, width = shape
+    grid = (np.arange(samples) + 0.5) / samples - 0.5
+    xs = (np.arange(width)[:, None] + grid).ravel()
+    ys = (np.arange(height)[:, None] + grid).ravel()
+    centre = y0 + (xs - x0) * (y1 - y0) / max(x1 - x0, 1)
+    inside = (np.abs(ys[:, None] - centre) <= 0.5) & (xs >= x0 - 0.5) & (xs <= x1 + 0.5)
+    return inside.reshape(height, samples, width, samples).mean(axis=(1, 3))
+
+def antialias(lengths=DEFAULT_LENGTHS, slopes=DEFAULT_SLOPES, factors=(2, 4), warmup=3, trials=20,
+              min_trial_ns=200_000):
+    # Wu vs supersampled Bresenham: time per line and RMS coverage error
+    # against reference_image, over the cells either one touches.
+    rows = []
+    for params, segment in line_cases(lengths, slopes):
+        if params['octant'] != 0:
+            continue
+        x0, y0, x1, y1 = segment
+        shape = (abs(y1 - y0) + 2, abs(x1 - x0) + 2)
+        reference = reference_image(segment, shape)
+        methods = {'wu': partial(wu_image, segment, shape)}
+        for factor in factors:
+            methods[f'supersampled x{factor}'] = partial(supersampled_image, segment, shape, factor)
+        for name, method in methods.items():
+            error = np.sqrt(np.mean((method() - reference) ** 2))
+            samples, _ = time_call(method, (), warmup, trials, min_trial_ns)
+            rows.append({'algorithm': name, **params, 'rms_error': error, **summarize(samples)})
+    return rows
+
+def print_antialias(rows):
+    print(f'{"method":<18}{"size":>6}{"slope":>7}{"median us":>12}{"rms error":>11}')
+    for row in rows:
+        print(f'{row["algorithm"]:<18}{row["size"]:>6}{row["slope"]:>7}{row["median_ns"] / 1000:>12.2f}'
+              f'{row["rms_error"]:>11.4f}')
+
+
+def offscreen_scene(count, size, viewport=(0, 0, 159, 119), seed=0):
+    # Lines and circles `size` cells across scattered over an area about
+    # size / 10 times wider than the viewport, so most of each lies off it.
+    rng = np.random.default_rng(seed)
+    x_min, y_min, x_max, y_max = viewport
+    spread = size // 2
+    centres = rng.integers((x_min - spread, y_min - spread), (x_max + spread, y_max + spread), (count, 2))
+    angles = rng.uniform(0, 2 * np.pi, count)
+    offsets = np.rint(np.stack((np.cos(angles), np.sin(angles)), axis=1) * size / 2).astype(np.int64)
+    segments = np.concatenate((centres - offsets, centres + offsets), axis=1)
+    circles = np.concatenate((centres, np.full((count, 1), size // 2)), axis=1)
+    return segments, circles
+
+def clipping(sizes=(256, 1024, 4096), count=200, viewport=(0, 0, 159, 119), warmup=3, trials=20,
+             min_trial_ns=200_000):
+    # Full vs clipped rasterization of mostly off-screen geometry, both
+    # plotted into a viewport-sized framebuffer.
+    width, height = viewport[2] + 1, viewport[3] + 1
+    rows = []
+    for size in sizes:
+        segments, circles = offscreen_scene(count, size, viewport)
+        methods = {
+            'bresenham': (lambda: bresenham_lines(segments)[0],
+                          lambda: clipped_bresenham_lines(segments, viewport)[0]),
+            'dda': (lambda: np.concatenate([dda_line(*s) for s in segments.tolist()]),
+                    lambda: np.concatenate([clipped_dda_line(*s, viewport) for s in segments.tolist()])),
+            'circle': (lambda: circles_points(circles)[0],
+                       lambda: clipped_circles_points(circles, viewport)),
+        }
+        for name, (full, clipped) in methods.items():
+            buffers = [new_framebuffer(width, height) for _ in range(2)]
+            plot(buffers[0], full())
+            plot(buffers[1], clipped())
+            if not np.array_equal(*buffers):
+                raise AssertionError(f'clipped {name} differs')
+            row = {'algorithm': name, 'size': size, 'visible': int(np.count_nonzero(buffers[0]))}
+            for label, func in (('full', full), ('clipped', clipped)):
+                framebuffer = new_framebuffer(width, height)
+                samples, _ = time_call(lambda: plot(framebuffer, func()), (), warmup, trials, min_trial_ns)
+                row[f'{label}_pixels'] = len(func())
+                row[f'{label}_ns'] = statistics.median(samples)
+            rows.append(row)
+    return rows
+
+def print_clipping(rows):
+    print(f'{"algorithm":<11}{"size":>6}{"visible":>9}{"full px":>10}{"clipped px":>12}'
+          f'{"full us":>10}{"clipped us":>12}{"speedup":>9}')
+    for row in rows:
+        print(f'{row["algorithm"]:<11}{row["size"]:>6}{row["visible"]:>9}{row["full_pixels"]:>10}'
+              f'{row["clipped_pixels"]:>12}{row["full_ns"] / 1000:>10.1f}{row["clipped_ns"] / 1000:>12.1f}'
+              f'{row["full_ns"] / row["clipped_ns"]:>8.1f}x')
+
+
+def parallel_scaling(workers=None, count=50_000, width=1024, height=1024, warmup=1, trials=5, min_trial_ns=0):
+    # Serial vs render_parallel with 1..N worker processes on one scene.
+    # Pools are started before timing; what is timed includes sending the
+    # shapes to the workers and merging their canvases.
+    workers = workers or range(1, os.cpu_count() + 1)
+    segments, circles = random_scene(count, width, height)
+    reference = render_serial(width, height, segments, circles)
+    samples, _ = time_call(render_serial, (width, height, segments, circles), warmup, trials, min_trial_ns)
+    serial_ns = statistics.median(samples)
+    rows = [{'workers': 'serial', 'median_ns': serial_ns, 'speedup': 1.0}]
+    for n in workers:
+        with ProcessPoolExecutor(n) as pool:
+            render = partial(render_parallel, width, height, segments, circles, workers=n, pool=pool)
+            if not np.array_equal(render(), reference):
+                raise AssertionError(f'parallel render with {n} workers differs')
+            samples, _ = time_call(render, (), warmup, trials, min_trial_ns)
+        rows.append({'workers': n, 'median_ns': statistics.median(samples),
+                     'speedup': serial_ns / statistics.median(samples)})
+    return rows
+
+def print_parallel_scaling(rows):
+    print(f'{"workers":>8}{"median ms":>12}{"speedup":>9}')
+    for row in rows:
+        print(f'{row["workers"]:>8}{row["median_ns"] / 1e6:>12.1f}{row["speedup"]:>8.2f}x')
+
+
+def spatial_queries(counts=(10_000, 100_000, 300_000), width=4096, height=4096, rect_size=64, queries=200,
+                    warmup=1, trials=5, min_trial_ns=0):
+    # ShapeIndex.query vs testing every bounding box, for random rects in
+    # scenes of `count` lines and `count` circles; both must agree.
+    rng = np.random.default_rng(1)
+    rows = []
+    for count in counts:
+        segments, circles = random_scene(count, width, height)
+        index = ShapeIndex()
+        start = time.perf_counter_ns()
+        index.add_layer('bresenham', segments)
+        index.add_layer('circle', circles)
+        build_ns = time.perf_counter_ns() - start
+        boxes = np.array([index.boxes[shape_id] for shape_id in sorted(index.boxes)])
+        rects = [(x, y, rect_size, rect_size) for x, y in rng.integers(0, (width, height), (queries, 2)).tolist()]
+
+        def scan():
+            return [np.flatnonzero((boxes[:, 0] < x + w) & (boxes[:, 2] >= x) & (boxes[:, 1] < y + h)
+                                   & (boxes[:, 3] >= y)).tolist() for x, y, w, h in rects]
+
+        def query():
+            return [index.query(rect) for rect in rects]
+
+        if scan() != query():
+            raise AssertionError(f'index and scan disagree with {count} shapes')
+        row = {'shapes': len(index), 'build_ms': build_ns / 1e6, 'found': sum(map(len, query())) / queries}
+        for label, func in (('scan', scan), ('index', query)):
+            samples, _ = time_call(func, (), warmup, trials, min_trial_ns)
+            row[f'{label}_us'] = statistics.median(samples) / queries / 1000
+        rows.append(row)
+    return rows
+
+def print_spatial_queries(rows):
+    print(f'{"shapes":>8}{"build ms":>10}{"found":>8}{"scan us":>10}{"index us":>10}{"speedup":>9}')
+    for row in rows:
+        print(f'{row["shapes"]:>8}{row["build_ms"]:>10.0f}{row["found"]:>8.1f}{row["scan_us"]:>10.1f}'
+              f'{row["index_us"]:>10.1f}{row["scan_us"] / row["index_us"]:>8.1f}x')
+
+
+# bench name -> jit name, for the functions with a compiled backend.
+BACKEND_FUNCTIONS = {'dda': 'dda_algorithm', 'bresenham': 'bresenham_line', 'bresenham_circle': 'bresenham_circle'}
+
+def backends(lengths=DEFAULT_LENGTHS, slopes=DEFAULT_SLOPES, radii=DEFAULT_RADII, warmup=3, trials=20,
+             min_trial_ns=200_000):
+    # Pure Python vs numba for the same inputs. The first compiled call of
+    # each function is timed on its own: it compiles, or with a warm disk
+    # cache only loads the machine code. jit is imported here, so that
+    # importing bench (test.py does) does not load numba.
+    from jit import check_backends, rasterizers
+    python, compiled = rasterizers('python'), rasterizers('numba')
+    first = {}
+    for name, jit_name in BACKEND_FUNCTIONS.items():
+        start = time.perf_counter_ns()
+        compiled[jit_name](*((0, 0, 1) if ALGORITHMS[name][1] == 'circle' else (0, 0, 1, 1)))
+        first[name] = time.perf_counter_ns() - start
+
+    rows = []
+    for name, jit_name in BACKEND_FUNCTIONS.items():
+        cases = line_cases(lengths, slopes) if ALGORITHMS[name][1] == 'line' else circle_cases(radii)
+        for params, args in cases:
+            reference = check_backends(jit_name, *args)
+            row = {'algorithm': name, **params, 'pixels': len(reference), 'first_call_ns': first[name]}
+            for backend, func in (('python', python[jit_name]), ('numba', compiled[jit_name])):
+                samples, _ = time_call(func, args, warmup, trials, min_trial_ns)
+                row[f'{backend}_ns'] = statistics.median(samples)
+            rows.append(row)
+    return rows
+
+def print_backends(rows):
+    print(f'{"algorithm":<18}{"size":>6}{"oct":>5}{"slope":>7}{"pixels":>8}{"python us":>11}{"numba us":>10}'
+          f'{"speedup":>9}{"first call ms":>15}')
+    for row in rows:
+        print(f'{row["algorithm"]:<18}{row["size"]:>6}{row["octant"]:>5}{row["slope"]:>7}{row["pixels"]:>8}'
+              f'{row["python_ns"] / 1000:>11.2f}{row["numba_ns"] / 1000:>10.2f}'
+              f'{row["python_ns"] / row["numba_ns"]:>8.1f}x{row["first_call_ns"] / 1e6:>15.1f}')
+
+
+def environment():
+    return {
+        'python': sys.version.split()[0],
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'platform': platform.platform(),
+    }
+
+
+def write_json(path, results):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'environment': environment(), 'results': results}, f, indent=2)
+
+def write_csv(path, results):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(results)
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as f:
+        rows = json.load(f)['results']
+    return {case_key(row): row for row in rows}
+
+def case_key(row):
+    return row['algorithm'], row['size'], row['octant'], row['slope']
+
+
+def print_table(results, baseline=None):
+    header = f'{"algorithm":<20}{"size":>6}{"oct":>5}{"slope":>7}{"pixels":>8}{"median us":>12}{"p95 us":>10}{"Mpx/s":>9}'
+    if baseline is not None:
+        header += f'{"vs base":>9}'
+    print(header)
+    for row in results:
+        line = (f'{row["algorithm"]:<20}{row["size"]:>6}{row["octant"]:>5}{row["slope"]:>7}{row["pixels"]:>8}'
+                f'{row["median_ns"] / 1000:>12.2f}{row["p95_ns"] / 1000:>10.2f}{row["pixels_per_sec"] / 1e6:>9.2f}')
+        if baseline is not None:
+            base = baseline.get(case_key(row))
+            line += f'{base["median_ns"] / row["median_ns"]:>8.2f}x' if base else f'{"-":>9}'
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the lab3 rasterization algorithms.')
+    parser.add_argument('--algorithms', nargs='+', choices=sorted(ALGORITHMS), default=list(ALGORITHMS))
+    parser.add_argument('--lengths', nargs='+', type=int, default=DEFAULT_LENGTHS)
+    parser.add_argument('--slopes', nargs='+', type=float, default=DEFAULT_SLOPES)
+    parser.add_argument('--radii', nargs='+', type=int, default=DEFAULT_RADII)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--trials', type=int, default=20)
+    parser.add_argument('--min-trial-us', type=float, default=200.0)
+    parser.add_argument('--json', help='write results to this JSON file')
+    parser.add_argument('--csv', help='write results to this CSV file')
+    parser.add_argument('--baseline', help='JSON file from an earlier run to compare medians against')
+    parser.add_argument('--equivalence', action='store_true',
+                        help='compare the line algorithms with bresenham_line instead of timing them')
+    parser.add_argument('--antialias', action='store_true',
+                        help='compare Wu lines with supersampled Bresenham in time and coverage error')
+    parser.add_argument('--clipping', action='store_true',
+                        help='time full vs clipped rasterization of mostly off-screen lines and circles')
+    parser.add_argument('--backends', action='store_true',
+                        help='compare the pure Python and numba backends on the same inputs')
+    parser.add_argument('--parallel', action='store_true',
+                        help='time the parallel scene rasterizer with 1..N worker processes against serial')
+    parser.add_argument('--workers', nargs='+', type=int, help='worker counts for --parallel (default 1..cores)')
+    parser.add_argument('--shapes', type=int, default=50_000, help='lines and circles each in the --parallel scene')
+    parser.add_argument('--spatial', action='store_true',
+                        help='time ShapeIndex region queries against scanning every shape')
+    args = parser.parse_args()
+
+    if args.spatial:
+        print_spatial_queries(spatial_queries(trials=args.trials))
+        return
+    if args.parallel:
+        print(f'{os.cpu_count()} cores')
+        print_parallel_scaling(parallel_scaling(args.workers, args.shapes, trials=args.trials))
+        return
+    if args.backends:
+        from jit import numba
+        if numba is None:
+            parser.error('--backends needs numba installed')
+        print_backends(backends(args.lengths, args.slopes, args.radii, warmup=args.warmup, trials=args.trials,
+                                min_trial_ns=int(args.min_trial_us * 1000)))
+        return
+    if args.clipping:
+        print_clipping(clipping(warmup=args.warmup, trials=args.trials, min_trial_ns=int(args.min_trial_us * 1000)))
+        return
+    if args.antialias:
+        print_antialias(antialias(args.lengths, args.slopes, warmup=args.warmup, trials=args.trials,
+                                  min_trial_ns=int(args.min_trial_us * 1000)))
+        return
+
+    if args.equivalence:
+        print_equivalence(equivalence(args.algorithms, args.lengths))
+        return
+
+    results = run(args.algorithms, args.lengths, args.slopes, args.radii,
+                  args.warmup, args.trials, int(args.min_trial_us * 1000))
+    print_table(results, load_baseline(args.baseline) if args.baseline else None)
+    if args.json:
+        write_json(args.json, results)
+    if args.csv:
+        write_csv(args.csv, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+import math
+
+import numpy as np
+
+from batch import bresenham_lines, dda_line, octant_x, segments_array, step_by_step_line, wu_lines
+
+# Clipping ahead of the rasterizers, so that work is bounded by the visible
+# pixels instead of the whole primitive. A viewport is (x_min, y_min,
+# x_max, y_max) in grid cells, ends inclusive; viewport_of(buffer) is the
+# whole framebuffer. Clipping only decides which pixels to compute: the
+# pixels that come out are exactly the visible ones of the unclipped
+# primitive.
+
+INSIDE, LEFT, RIGHT, BOTTOM, TOP = 0, 1, 2, 4, 8
+
+
+def viewport_of(buffer):
+    height, width = buffer.shape[:2]
+    return 0, 0, width - 1, height - 1
+
+def outcode(x, y, viewport):
+    x_min, y_min, x_max, y_max = viewport
+    return ((LEFT if x < x_min else RIGHT if x > x_max else INSIDE)
+            | (BOTTOM if y < y_min else TOP if y > y_max else INSIDE))
+
+def outcodes(x, y, viewport):
+    # Cohen-Sutherland region codes, for arrays of points.
+    x_min, y_min, x_max, y_max = viewport
+    x = np.asarray(x)
+    y = np.asarray(y)
+    return (np.where(x < x_min, LEFT, 0) | np.where(x > x_max, RIGHT, 0)
+            | np.where(y < y_min, BOTTOM, 0) | np.where(y > y_max, TOP, 0))
+
+def liang_barsky(segments, viewport):
+    # Parameter range [t0, t1] of each segment inside viewport, for (N, 4)
+    # segments; t0 > t1 where it misses. Segments whose endpoints share an
+    # outside region (Cohen-Sutherland's trivial reject) miss outright.
+    x0, y0, x1, y1 = segments_array(segments).T.astype(np.float64)
+    x_min, y_min, x_max, y_max = viewport
+    dx, dy = x1 - x0, y1 - y0
+    t0 = np.zeros_like(x0)
+    t1 = np.ones_like(x0)
+    for p, q in ((-dx, x0 - x_min), (dx, x_max - x0), (-dy, y0 - y_min), (dy, y_max - y0)):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = q / p
+        entering = p < 0
+        leaving = p > 0
+        t0 = np.where(entering, np.maximum(t0, t), t0)
+        t1 = np.where(leaving, np.minimum(t1, t), t1)
+        # Parallel to this edge and outside it.
+        t1 = np.where((p == 0) & (q < 0), -1.0, t1)
+    rejected = (outcodes(x0, y0, viewport) & outcodes(x1, y1, viewport)) != 0
+    t1[rejected] = -1.0
+    return t0, t1
+
+
+def liang_barsky_segment(x0, y0, x1, y1, viewport):
+    # liang_barsky for one segment in plain Python, which is much cheaper
+    # than NumPy for a single call. Returns (t0, t1), or None on a miss.
+    x_min, y_min, x_max, y_max = viewport
+    dx, dy = x1 - x0, y1 - y0
+    t0, t1 = 0.0, 1.0
+    for p, q in ((-dx, x0 - x_min), (dx, x_max - x0), (-dy, y0 - y_min), (dy, y_max - y0)):
+        if p == 0:
+            if q < 0:
+                return None
+        elif p < 0:
+            t0 = max(t0, q / p)
+        else:
+            t1 = min(t1, q / p)
+    return (t0, t1) if t0 <= t1 else None
+
+def line_steps(segments, viewport, margin=0.5):
+    # [start, stop) major-axis steps of each segment that can have visible
+    # pixels. A line pixel is within half a cell of the exact line along the
+    # minor axis, so the exact line is clipped to the viewport grown by half
+    # a cell, plus a step of slack for rounding; plot() drops the extras.
+    # Wu's upper cell can be a whole cell off the line, hence margin.
+    segments = segments_array(segments)
+    x_min, y_min, x_max, y_max = viewport
+    t0, t1 = liang_barsky(segments, (x_min - margin, y_min - margin, x_max + margin, y_max + margin))
+    x0, y0, x1, y1 = segments.T
+    major = np.maximum(np.abs(x1 - x0), np.abs(y1 - y0))
+    start = np.maximum(np.floor(t0 * major).astype(np.int64) - 1, 0)
+    stop = np.minimum(np.ceil(t1 * major).astype(np.int64) + 2, major + 1)
+    stop = np.where(t0 <= t1, stop, start)
+    return np.stack((start, stop), axis=1)
+
+def clipped_bresenham_lines(segments, viewport):
+    # bresenham_lines limited to the steps that can be visible.
+    return bresenham_lines(segments, line_steps(segments, viewport))
+
+def clipped_wu_lines(segments, viewport):
+    # wu_lines limited to the steps that can be visible.
+    return wu_lines(segments, line_steps(segments, viewport, margin=1.0))
+
+def clipped_dda_line(x0, y0, x1, y1, viewport):
+    # dda_line for the visible steps only. The running sums are what make
+    # DDA's pixels, so they are still added up to the last visible step,
+    # but that is one cheap pass; nothing past it is computed, and only
+    # the visible steps are rounded into pixels.
+    steps = max(abs(x1 - x0), abs(y1 - y0))
+    if steps == 0 or not (outcode(x0, y0, viewport) or outcode(x1, y1, viewport)):
+        return dda_line(x0, y0, x1, y1)
+    x_min, y_min, x_max, y_max = viewport
+    t = liang_barsky_segment(x0, y0, x1, y1, (x_min - 0.5, y_min - 0.5, x_max + 0.5, y_max + 0.5))
+    if t is None:
+        return np.empty((0, 2), dtype=np.int32)
+    # Same slack as line_steps.
+    start = max(math.floor(t[0] * steps) - 1, 0)
+    stop = min(math.ceil(t[1] * steps) + 2, steps + 1)
+    xs = np.add.accumulate(np.r_[float(x0), np.full(stop - 1, (x1 - x0) / steps)])[start:]
+    ys = np.add.accumulate(np.r_[float(y0), np.full(stop - 1, (y1 - y0) / steps)])[start:]
+    return np.stack((np.rint(xs), np.rint(ys)), axis=1).astype(np.int32)
+
+def clipped_step_by_step_line(x0, y0, x1, y1, viewport):
+    # step_by_step_line for the visible samples only. Its x steps by
+    # 1 / max(|dx|, |dy|), |dx| * max(|dx|, |dy|) samples in all, and is a
+    # running sum like DDA's, so it too is added up to the last visible
+    # sample; each sample's y comes from its x, so only the visible
+    # samples are rounded into pixels.
+    x_min, y_min, x_max, y_max = viewport
+    if x0 == x1:
+        if not x_min <= x0 <= x_max:
+            return np.empty((0, 2), dtype=np.int32)
+        ys = np.arange(max(min(y0, y1), y_min), min(max(y0, y1), y_max) + 1)
+        return np.stack((np.full_like(ys, x0), ys), axis=1).astype(np.int32)
+    if not (outcode(x0, y0, viewport) or outcode(x1, y1, viewport)):
+        return step_by_step_line(x0, y0, x1, y1)
+    t = liang_barsky_segment(x0, y0, x1, y1, (x_min - 0.5, y_min - 0.5, x_max + 0.5, y_max + 0.5))
+    if t is None:
+        return np.empty((0, 2), dtype=np.int32)
+    dx = x1 - x0
+    k = (y1 - y0) / dx
+    b = y0 - k * x0
+    step = 1 / max(abs(dx), abs(y1 - y0))
+    samples = abs(dx) * max(abs(dx), abs(y1 - y0))
+    # Same slack as line_steps.
+    start = max(math.floor(t[0] * samples) - 1, 0)
+    stop = min(math.ceil(t[1] * samples) + 2, samples + 2)
+    xs = np.add.accumulate(np.r_[float(x0), np.full(stop - 1, step if dx > 0 else -step)])[start:]
+    xs = xs[xs <= x1] if dx > 0 else xs[xs >= x1]
+    ys = k * xs + b
+    return np.stack((np.rint(xs), np.rint(ys)), axis=1).astype(np.int32)
+
+
+# circles_points builds a circle from the octant pixels (a, b), b <= a, as
+# the quadrant (a, b) and (b, a) rotated four times. Each of those eight
+# arcs is (xc + X, yc + Y) where X is +-a or +-b and Y the other one.
+# Per arc: mirrored (the (b, a) half), whether X is b, and the signs.
+ARC_MIRRORED = np.array([False] * 4 + [True] * 4)
+ARC_X_IS_B = np.array([False, True, False, True, True, False, True, False])
+ARC_X_SIGN = np.array([1, -1, -1, 1] * 2)
+ARC_Y_SIGN = np.array([1, 1, -1, -1] * 2)
+
+def _arc_rows(centre, r, low, high, sign, is_b, first, last):
+    # Narrows the octant rows [first, last] of each (circle, arc) to those
+    # whose coordinate centre + sign * value can land in [low, high]. If
+    # the value is b, that is a range of rows. If it is a, which is about
+    # sqrt(r^2 - b^2) and falls as b grows, it is a range of rows too,
+    # widened by one row each side for rounding.
+    value_low = np.where(sign > 0, low - centre, centre - high)
+    value_high = np.where(sign > 0, high - centre, centre - low)
+    a_first = np.floor(np.sqrt(np.maximum(r * r - (value_high + 1) ** 2, 0))).astype(np.int64) - 1
+    a_first = np.where(value_high + 1 < r, a_first, 0)
+    a_last = np.ceil(np.sqrt(np.maximum(r * r - (np.maximum(value_low, 1) - 1) ** 2, 0))).astype(np.int64) + 1
+    a_last = np.where((value_high < 0) | (value_low > r), -1, a_last)
+    first = np.maximum(first, np.where(is_b, value_low, a_first))
+    last = np.minimum(last, np.where(is_b, value_high, a_last))
+    return first, last
+
+def clipped_circles_points(circles, viewport):
+    # circles_points limited to the octant arcs that cross the viewport,
+    # and within them to the rows that can be visible. Circles entirely
+    # outside cost nothing.
+    xc, yc, r = np.asarray(circles, dtype=np.int64).reshape(-1, 3).T
+    x_min, y_min, x_max, y_max = viewport
+    visible = (xc + r >= x_min) & (xc - r <= x_max) & (yc + r >= y_min) & (yc - r <= y_max)
+    xc, yc, r = xc[visible, None], yc[visible, None], r[visible, None]
+
+    first = np.zeros((len(r), 8), dtype=np.int64)
+    last = (r / np.sqrt(2)).astype(np.int64) + 1 + first
+    first, last = _arc_rows(xc, r, x_min, x_max, ARC_X_SIGN, ARC_X_IS_B, first, last)
+    first, last = _arc_rows(yc, r, y_min, y_max, ARC_Y_SIGN, ~ARC_X_IS_B, first, last)
+
+    counts = np.maximum(last - first + 1, 0).ravel()
+    piece = np.repeat(np.arange(len(counts)), counts)
+    b = np.arange(len(piece)) - np.repeat(np.cumsum(counts) - counts, counts) + first.ravel()[piece]
+    circle, arc = np.divmod(piece, 8)
+    a = octant_x(r[circle, 0], b)
+    keep = (a >= b) & (b <= r[circle, 0])
+    # The diagonal and (0, r) come from the unmirrored arcs; r == 0 is the
+    # centre, once.
+    keep &= ~ARC_MIRRORED[arc] | ((a != b) & (b > 0))
+    keep &= (arc == 0) | (r[circle, 0] > 0)
+    a, b, circle, arc = a[keep], b[keep], circle[keep], arc[keep]
+    x_is_b = ARC_X_IS_B[arc]
+    xs = xc[circle, 0] + ARC_X_SIGN[arc] * np.where(x_is_b, b, a)
+    ys = yc[circle, 0] + ARC_Y_SIGN[arc] * np.where(x_is_b, a, b)
+    return np.stack((xs, ys), axis=1).astype(np.int32)
+
+def clipped_circle_points(xc, yc, r, viewport):
+    return clipped_circles_points([(xc, yc, r)], viewport)
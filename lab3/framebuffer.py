@@ -0,0 +1,157 @@
+import numpy as np
+
+from batch import disk_spans, ellipse_points
+from clip import (clipped_bresenham_lines, clipped_circle_points, clipped_circles_points, clipped_dda_line,
+                  clipped_step_by_step_line, clipped_wu_lines, viewport_of)
+from polygon import EVEN_ODD, polygon_spans, polygons_spans
+
+# A framebuffer is a 2-D array indexed [y, x], one element per grid cell.
+# Drawing writes straight into it; pixels outside it are clipped. The
+# draw functions return the changed cells as an (x, y, w, h) rect, or None
+# when nothing was visible. Lines, Wu lines included, and circles are
+# clipped to the buffer before they are rasterized (see clip.py).
+
+
+def new_framebuffer(width, height, dtype=np.uint8):
+    return np.zeros((height, width), dtype=dtype)
+
+def plot(buffer, coords, value=1):
+    x = coords[:, 0]
+    y = coords[:, 1]
+    height, width = buffer.shape[:2]
+    visible = (x >= 0) & (x < width) & (y >= 0) & (y < height)
+    x = x[visible]
+    y = y[visible]
+    if not len(x):
+        return None
+    buffer[y, x] = value
+    x_min, y_min = x.min(), y.min()
+    return int(x_min), int(y_min), int(x.max() - x_min) + 1, int(y.max() - y_min) + 1
+
+def blend(buffer, coords, coverage, value=1):
+    # Composites value over the covered cells: dst * (1 - a) + value * a.
+    # A cell covered several times gets a = 1 - prod(1 - a_i), the same as
+    # blending one draw after another. Integer buffers are rounded and
+    # clipped; value can be a colour for (height, width, channels) buffers.
+    x = coords[:, 0]
+    y = coords[:, 1]
+    height, width = buffer.shape[:2]
+    visible = (x >= 0) & (x < width) & (y >= 0) & (y < height)
+    x, y, coverage = x[visible], y[visible], np.asarray(coverage, dtype=np.float64)[visible]
+    if not len(x):
+        return None
+    x_min, y_min = int(x.min()), int(y.min())
+    w, h = int(x.max()) - x_min + 1, int(y.max()) - y_min + 1
+    transmitted = np.ones(h * w)
+    np.multiply.at(transmitted, (y - y_min) * w + x - x_min, 1 - coverage)
+    transmitted = transmitted.reshape(h, w)
+
+    region = buffer[y_min:y_min + h, x_min:x_min + w]
+    covered = transmitted < 1
+    alpha = 1 - transmitted[covered]
+    if buffer.ndim == 3:
+        alpha = alpha[:, None]
+    blended = region[covered] * (1 - alpha) + np.asarray(value, dtype=np.float64) * alpha
+    if np.issubdtype(buffer.dtype, np.integer):
+        info = np.iinfo(buffer.dtype)
+        blended = np.clip(np.rint(blended), info.min, info.max)
+    region[covered] = blended
+    return x_min, y_min, w, h
+
+def draw_step_by_step(buffer, x0, y0, x1, y1, value=1):
+    return plot(buffer, clipped_step_by_step_line(x0, y0, x1, y1, viewport_of(buffer)), value)
+
+def draw_dda(buffer, x0, y0, x1, y1, value=1):
+    return plot(buffer, clipped_dda_line(x0, y0, x1, y1, viewport_of(buffer)), value)
+
+def draw_bresenham(buffer, x0, y0, x1, y1, value=1):
+    return plot(buffer, clipped_bresenham_lines([(x0, y0, x1, y1)], viewport_of(buffer))[0], value)
+
+def draw_wu(buffer, x0, y0, x1, y1, value=1):
+    coords, coverage, _ = clipped_wu_lines([(x0, y0, x1, y1)], viewport_of(buffer))
+    return blend(buffer, coords, coverage, value)
+
+def draw_wu_lines(buffer, segments, value=1):
+    coords, coverage, _ = clipped_wu_lines(segments, viewport_of(buffer))
+    return blend(buffer, coords, coverage, value)
+
+def fill_spans(buffer, spans, value=1):
+    # spans: (N, 3) rows of (y, x_start, x_end), ends inclusive. The spans
+    # become +1/-1 marks at their ends; a running sum along each row then
+    # covers every span, so the cost does not depend on the span count.
+    height, width = buffer.shape[:2]
+    spans = np.asarray(spans, dtype=np.int64).reshape(-1, 3)
+    y = spans[:, 0]
+    x0 = np.maximum(spans[:, 1], 0)
+    x1 = np.minimum(spans[:, 2], width - 1)
+    visible = (y >= 0) & (y < height) & (x0 <= x1)
+    y, x0, x1 = y[visible], x0[visible], x1[visible]
+    if not len(y):
+        return None
+    x_min, y_min = int(x0.min()), int(y.min())
+    w, h = int(x1.max()) - x_min + 1, int(y.max()) - y_min + 1
+    rows = (y - y_min) * (w + 1)
+    marks = np.bincount(rows + x0 - x_min, minlength=h * (w + 1))
+    marks -= np.bincount(rows + x1 + 1 - x_min, minlength=h * (w + 1))
+    covered = np.cumsum(marks.reshape(h, w + 1), axis=1)[:, :w] > 0
+    buffer[y_min:y_min + h, x_min:x_min + w][covered] = value
+    return x_min, y_min, w, h
+
+def draw_circle(buffer, xc, yc, r, value=1):
+    return plot(buffer, clipped_circle_points(xc, yc, r, viewport_of(buffer)), value)
+
+def draw_circles(buffer, circles, value=1):
+    # circles: (N, 3) array of (xc, yc, r), drawn in one scatter.
+    return plot(buffer, clipped_circles_points(circles, viewport_of(buffer)), value)
+
+def draw_disk(buffer, xc, yc, r, value=1):
+    return fill_spans(buffer, disk_spans(xc, yc, r), value)
+
+def draw_ellipse(buffer, xc, yc, rx, ry, value=1):
+    return plot(buffer, ellipse_points(xc, yc, rx, ry), value)
+
+def draw_polygon(buffer, vertices, rule=EVEN_ODD, value=1):
+    return fill_spans(buffer, polygon_spans(vertices, rule), value)
+
+def draw_polygons(buffer, polygons, rule=EVEN_ODD, value=1):
+    return fill_spans(buffer, polygons_spans(polygons, rule)[0], value)
+
+
+class PixelCanvas:
+    # Deduplicated set of drawn cells. Each cell stores the generation it
+    # was last drawn in, so clear() only bumps the generation instead of
+    # touching the array.
+    def __init__(self, width, height):
+        self.stamps = new_framebuffer(width, height, np.uint16)
+        self.generation = 1
+
+    def draw(self, draw_function, *args):
+        return draw_function(self.stamps, *args, value=self.generation)
+
+    def add(self, coords):
+        return plot(self.stamps, np.asarray(coords, dtype=np.int32).reshape(-1, 2), self.generation)
+
+    def clear(self):
+        self.generation += 1
+        if self.generation > np.iinfo(self.stamps.dtype).max:
+            self.stamps.fill(0)
+            self.generation = 1
+
+    def mask(self, rect=None):
+        stamps = self.stamps
+        if rect is not None:
+            x, y, w, h = rect
+            stamps = stamps[y:y + h, x:x + w]
+        return stamps == self.generation
+
+    def points(self):
+        ys, xs = np.nonzero(self.mask())
+        return np.stack((xs, ys), axis=1)
+
+    def __len__(self):
+        return int(np.count_nonzero(self.mask()))
+
+    def __contains__(self, point):
+        x, y = point
+        height, width = self.stamps.shape
+        return 0 <= x < width and 0 <= y < height and self.stamps[y, x] == self.generation
@@ -0,0 +1,129 @@
+import os
+
+import numpy as np
+
+import raster
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Optional compiled versions of the scalar rasterizers in raster.py. With
+# numba installed the loops are JIT-compiled on first use and the machine
+# code is cached on disk (cache=True, in __pycache__), so later runs load
+# it instead of compiling again. Without numba, or with LAB_BACKEND=python,
+# the raster.py functions are used. Both backends return the same pixels
+# in the same order as (M, 2) int32 arrays, so callers see one type
+# whichever is installed.
+
+# Backend selection, copied in lab1/jit.py (each lab is its own script dir).
+BACKENDS = ('python', 'numba')
+
+
+def resolve_backend(name=None):
+    name = name or os.environ.get('LAB_BACKEND', 'auto')
+    if name == 'auto':
+        return 'numba' if numba is not None else 'python'
+    if name not in BACKENDS:
+        raise ValueError(f'unknown backend {name!r}')
+    if name == 'numba' and numba is None:
+        raise ImportError('the numba backend needs numba installed')
+    return name
+
+
+def _as_array(func):
+    # The raster.py lists of tuples as the arrays the numba kernels return.
+    def rasterize(*args):
+        return np.asarray(func(*args), dtype=np.int32).reshape(-1, 2)
+    return rasterize
+
+PYTHON = {
+    'dda_algorithm': _as_array(raster.dda_algorithm),
+    'bresenham_line': _as_array(raster.bresenham_line),
+    'bresenham_circle': _as_array(raster.bresenham_circle),
+}
+
+if numba is not None:
+    @numba.njit(cache=True, nogil=True)
+    def _dda(x0, y0, x1, y1):
+        dx, dy = x1 - x0, y1 - y0
+        steps = max(abs(dx), abs(dy))
+        x_increment = dx / steps
+        y_increment = dy / steps
+        points = np.empty((steps + 1, 2), dtype=np.int32)
+        x, y = float(x0), float(y0)
+        for i in range(steps + 1):
+            points[i, 0] = round(x)
+            points[i, 1] = round(y)
+            x += x_increment
+            y += y_increment
+        return points
+
+    @numba.njit(cache=True, nogil=True)
+    def _bresenham_line(x0, y0, x1, y1):
+        dx = abs(x1 - x0)
+        dy = abs(y1 - y0)
+        sx = 1 if x0 < x1 else -1
+        sy = 1 if y0 < y1 else -1
+        err = dx - dy
+        points = np.empty((max(dx, dy) + 1, 2), dtype=np.int32)
+        for i in range(len(points)):
+            points[i, 0] = x0
+            points[i, 1] = y0
+            e2 = 2 * err
+            if e2 > -dy:
+                err -= dy
+                x0 += sx
+            if e2 < dx:
+                err += dx
+                y0 += sy
+        return points
+
+    @numba.njit(cache=True, nogil=True)
+    def _bresenham_circle(xc, yc, r):
+        # Eight pixels per step, r / sqrt(2) + 1 steps at most.
+        points = np.empty((8 * (max(r, 0) + 2), 2), dtype=np.int32)
+        n = 0
+        x = r
+        y = 0
+        d = 1 - r
+        while x >= y:
+            for xi, yi in ((x, y), (y, x), (-x, y), (-y, x), (x, -y), (-x, -y), (y, -x), (-y, -x)):
+                points[n, 0] = xc + xi
+                points[n, 1] = yc + yi
+                n += 1
+            y += 1
+            if d < 0:
+                d += 2 * y + 1
+            else:
+                x -= 1
+                d += 2 * y - 2 * x + 1
+        return points[:n]
+
+    NUMBA = {
+        'dda_algorithm': _dda,
+        'bresenham_line': _bresenham_line,
+        'bresenham_circle': _bresenham_circle,
+    }
+
+
+def rasterizers(backend=None):
+    # name -> function for the backend; None means LAB_BACKEND, else auto.
+    return NUMBA if resolve_backend(backend) == 'numba' else PYTHON
+
+def check_backends(name, *args):
+    # Runs `name` on both backends and raises if their pixels differ;
+    # returns the pixels.
+    expected = PYTHON[name](*args)
+    if numba is not None:
+        result = NUMBA[name](*args)
+        if result.dtype != expected.dtype or not np.array_equal(result, expected):
+            raise AssertionError(f'numba {name}{args} differs from the python backend')
+    return expected
+
+
+BACKEND = resolve_backend()
+dda_algorithm = rasterizers(BACKEND)['dda_algorithm']
+bresenham_line = rasterizers(BACKEND)['bresenham_line']
+bresenham_circle = rasterizers(BACKEND)['bresenham_circle']
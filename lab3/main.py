@@ -1,7 +1,13 @@
-import pygame
 import sys
 import time
-from pygame.locals import QUIT, MOUSEBUTTONDOWN, KEYDOWN
+
+import numpy as np
+
+from framebuffer import (PixelCanvas, new_framebuffer, draw_step_by_step, draw_dda, draw_bresenham, draw_wu, draw_circle,
+                         fill_spans)
+from polygon import polygon_spans
+from scene import save_scene
+from spatial import ShapeIndex, redraw
 
 WIDTH, HEIGHT = 800, 600
 GRID_SIZE = 5
@@ -10,97 +16,49 @@ WHITE = (255, 255, 255)
 RED = (255, 0, 0)
 DARK_GRAY = (30, 30, 30)
 BLUE = (0, 100, 255)
+SCENE_PATH = "lab3.scene"
+
+# Menu name -> scene.py primitive tag.
+SCENE_TAGS = {"Step by Step": "step_by_step", "DDA": "dda", "Bresenham": "bresenham", "Wu": "wu",
+              "Circle": "circle", "Polygon": "polygon"}
 
 SIDE_PANEL_WIDTH = 200
+GRID_COLS = (WIDTH - SIDE_PANEL_WIDTH) // GRID_SIZE
+GRID_ROWS = HEIGHT // GRID_SIZE
+SIDEBAR_RECT = (WIDTH - SIDE_PANEL_WIDTH, 0, SIDE_PANEL_WIDTH, HEIGHT)
 
-pygame.init()
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Rasterization Algorithms")
-font = pygame.font.SysFont('Courier New', 18)
-def draw_grid():
+def draw_grid(surface):
     for x in range(0, WIDTH - SIDE_PANEL_WIDTH, GRID_SIZE):
-        pygame.draw.line(screen, DARK_GRAY, (x, 0), (x, HEIGHT))
+        pygame.draw.line(surface, DARK_GRAY, (x, 0), (x, HEIGHT))
     for y in range(0, HEIGHT, GRID_SIZE):
-        pygame.draw.line(screen, DARK_GRAY, (0, y), (WIDTH, y))
-
-    pygame.draw.line(screen, WHITE, (0, HEIGHT // 2), (WIDTH - SIDE_PANEL_WIDTH, HEIGHT // 2), 2)
-    pygame.draw.line(screen, WHITE, ((WIDTH - SIDE_PANEL_WIDTH) // 2, 0), ((WIDTH - SIDE_PANEL_WIDTH) // 2, HEIGHT), 2)
-    
-def draw_pixel(x, y, color=RED):
-    pygame.draw.rect(screen, color, pygame.Rect(x * GRID_SIZE, y * GRID_SIZE, GRID_SIZE, GRID_SIZE))
-
-def step_by_step(x0, y0, x1, y1):
-    if x0 == x1:  
-        return [(x0, y) for y in range(min(y0, y1), max(y0, y1) + 1)]
-
-    points = []
-    dx = x1 - x0
-    dy = y1 - y0
-    k = dy / dx
-    b = y0 - k * x0
-    step = 1 / max(abs(dx), abs(dy))  
-    x = x0
-    if dx > 0:  
-        while x <= x1:
-            y = k * x + b
-            points.append((round(x), round(y)))
-            x += step
-    else:
-        while x >= x1:
-            y = k * x + b
-            points.append((round(x), round(y)))
-            x -= step
-
-    return points
-def dda_algorithm(x0, y0, x1, y1):
-    dx, dy = x1 - x0, y1 - y0
-    steps = max(abs(dx), abs(dy))
-    x_increment = dx / steps
-    y_increment = dy / steps
-    points = []
-    x, y = x0, y0
-    for _ in range(steps + 1):
-        points.append((round(x), round(y)))
-        x += x_increment
-        y += y_increment
-    return points
-
-def bresenham_line(x0, y0, x1, y1):
-    dx = abs(x1 - x0)
-    dy = abs(y1 - y0)
-    sx = 1 if x0 < x1 else -1
-    sy = 1 if y0 < y1 else -1
-    err = dx - dy
-    points = []
-    while True:
-        points.append((x0, y0))
-        if x0 == x1 and y0 == y1:
-            break
-        e2 = 2 * err
-        if e2 > -dy:
-            err -= dy
-            x0 += sx
-        if e2 < dx:
-            err += dx
-            y0 += sy
-    return points
-
-def bresenham_circle(xc, yc, r):
-    points = []
-    x = r
-    y = 0
-    d = 1 - r
-
-    while x >= y:
-        for xi, yi in [(x, y), (y, x), (-x, y), (-y, x), (x, -y), (-x, -y), (y, -x), (-y, -x)]:
-            points.append((xc + xi, yc + yi))
-        y += 1
-        if d < 0:
-            d += 2 * y + 1
-        else:
-            x -= 1
-            d += 2 * y - 2 * x + 1
-    return points
+        pygame.draw.line(surface, DARK_GRAY, (0, y), (WIDTH, y))
+
+    pygame.draw.line(surface, WHITE, (0, HEIGHT // 2), (WIDTH - SIDE_PANEL_WIDTH, HEIGHT // 2), 2)
+    pygame.draw.line(surface, WHITE, ((WIDTH - SIDE_PANEL_WIDTH) // 2, 0), ((WIDTH - SIDE_PANEL_WIDTH) // 2, HEIGHT), 2)
+
+def make_grid_surface():
+    surface = pygame.Surface((WIDTH, HEIGHT))
+    surface.fill(BLACK)
+    draw_grid(surface)
+    return surface
+
+def draw_cells(surface, cells, rect, color=RED):
+    # Repaints the cells covering rect onto surface, one GRID_SIZE square
+    # per cell, in color scaled by each cell's intensity (a mask or 0..1
+    # coverage). surfarray is indexed [x, y], the cells [y, x].
+    x, y, w, h = rect
+    pixels = (cells.T[:, :, None] * np.array(color)).astype(np.uint8)
+    cells_surface = pygame.surfarray.make_surface(pixels)
+    surface.blit(pygame.transform.scale(cells_surface, (w * GRID_SIZE, h * GRID_SIZE)), (x * GRID_SIZE, y * GRID_SIZE))
+    return pygame.Rect(x * GRID_SIZE, y * GRID_SIZE, w * GRID_SIZE, h * GRID_SIZE)
+
+def draw_spans(surface, spans, color=RED):
+    # One filled rect per span instead of one square per cell.
+    dirty = pygame.Rect(0, 0, 0, 0)
+    for y, x_start, x_end in spans.tolist():
+        rect = surface.fill(color, (x_start * GRID_SIZE, y * GRID_SIZE, (x_end - x_start + 1) * GRID_SIZE, GRID_SIZE))
+        dirty = dirty.union(rect) if dirty else rect
+    return dirty
 
 class RasterizationApp:
     def __init__(self):
@@ -109,32 +67,79 @@ class RasterizationApp:
         self.end_point = (0, 0)
         self.drawing = False
         self.radius = 0
+        self.polygon = []
+        # Everything drawn, as scene.py primitives in a spatial index, for
+        # erasing and redrawing parts of the grid; Ctrl+S saves them as a
+        # scene for scene.py to render headless.
+        self.shapes = ShapeIndex()
         self.input_active = False
         self.input_radius = ""
-        self.drawn_points = []
+        self.drawn_points = PixelCanvas(GRID_COLS, GRID_ROWS)
+        # Anti-aliased lines are blended here; a cell shows the brighter of
+        # its coverage and drawn_points.
+        self.coverage = new_framebuffer(GRID_COLS, GRID_ROWS, np.float32)
         self.execution_time = 0.0
+        self.frame_time = 0.0
+        self.fps = 0.0
+        # The grid and everything drawn so far live in off-screen surfaces;
+        # each frame only the rects touched since the last one are redrawn.
+        self.grid_surface = make_grid_surface()
+        self.layer = pygame.Surface((GRID_COLS * GRID_SIZE, GRID_ROWS * GRID_SIZE))
+        self.layer.set_colorkey(BLACK)
+        self.dirty_rects = []
+        self.full_redraw = True
 
     def draw_algorithm(self):
         x0, y0 = self.start_point
         start_time = time.time()
         
+        if self.algorithm == "Polygon":
+            self.shapes.add(SCENE_TAGS[self.algorithm], [c for vertex in self.polygon for c in vertex])
+            spans = polygon_spans(self.polygon)
+            self.polygon = []
+            if self.drawn_points.draw(fill_spans, spans):
+                self.dirty_rects.append(draw_spans(self.layer, spans))
+            self.execution_time = time.time() - start_time
+            return
         if self.algorithm == "Circle":
             r = self.radius
-            points = bresenham_circle(x0, y0, r)
+            self.shapes.add(SCENE_TAGS[self.algorithm], (x0, y0, r))
+            dirty = self.drawn_points.draw(draw_circle, x0, y0, r)
         else:
             x1, y1 = self.end_point
+            self.shapes.add(SCENE_TAGS[self.algorithm], (x0, y0, x1, y1))
             if self.algorithm == "Step by Step":
-                points = step_by_step(x0, y0, x1, y1)
+                dirty = self.drawn_points.draw(draw_step_by_step, x0, y0, x1, y1)
             elif self.algorithm == "DDA":
-                points = dda_algorithm(x0, y0, x1, y1)
+                dirty = self.drawn_points.draw(draw_dda, x0, y0, x1, y1)
             elif self.algorithm == "Bresenham":
-                points = bresenham_line(x0, y0, x1, y1)
+                dirty = self.drawn_points.draw(draw_bresenham, x0, y0, x1, y1)
+            elif self.algorithm == "Wu":
+                dirty = draw_wu(self.coverage, x0, y0, x1, y1)
 
         self.execution_time = time.time() - start_time
-        self.drawn_points.extend(points)
+        if dirty:
+            x, y, w, h = dirty
+            cells = np.maximum(self.drawn_points.mask(dirty), self.coverage[y:y + h, x:x + w])
+            self.dirty_rects.append(draw_cells(self.layer, cells, dirty))
+
+    def erase_at(self, x, y):
+        # Removes the topmost shape drawn on cell (x, y) and redraws just
+        # its bounding box from the shapes that are left.
+        hits = self.shapes.at(x, y)
+        if not hits:
+            return
+        rect = self.shapes.rect(hits[-1])
+        self.shapes.remove(hits[-1])
+        lines = [tag for tag in SCENE_TAGS.values() if tag != "wu"]
+        rect = redraw(self.drawn_points.stamps, self.shapes, rect, self.drawn_points.generation, lines)
+        redraw(self.coverage, self.shapes, rect, 1, ("wu",))
+        x, y, w, h = rect
+        cells = np.maximum(self.drawn_points.mask(rect), self.coverage[y:y + h, x:x + w])
+        self.dirty_rects.append(draw_cells(self.layer, cells, rect))
 
     def draw_sidebar(self):
-        pygame.draw.rect(screen, BLUE, (WIDTH - SIDE_PANEL_WIDTH, 0, SIDE_PANEL_WIDTH, HEIGHT))
+        pygame.draw.rect(screen, BLUE, SIDEBAR_RECT)
         text = font.render(f'Алгоритм: {self.algorithm}', True, WHITE)
         screen.blit(text, (WIDTH - SIDE_PANEL_WIDTH + 10, 10))
 
@@ -146,23 +151,34 @@ class RasterizationApp:
         time_text = font.render(f'Время: {self.execution_time:.6f} с', True, WHITE)
         screen.blit(time_text, (WIDTH - SIDE_PANEL_WIDTH + 10, 90))
 
-        algorithms = ["Step by Step", "DDA", "Bresenham", "Circle", "Clear"]
+        algorithms = ["Step by Step", "DDA", "Bresenham", "Wu", "Circle", "Polygon", "Erase", "Clear"]
         for i, algo in enumerate(algorithms):
             button_color = WHITE if self.algorithm == algo else BLACK
             label = font.render(algo, True, button_color)
             screen.blit(label, (WIDTH - SIDE_PANEL_WIDTH + 10, 120 + i * 30))
 
+        fps_text = font.render(f'FPS: {self.fps:.0f}  кадр: {self.frame_time * 1000:.2f} мс', True, WHITE)
+        screen.blit(fps_text, (WIDTH - SIDE_PANEL_WIDTH + 10, HEIGHT - 30))
+
     def redraw_all(self):
-        for x, y in self.drawn_points:
-            draw_pixel(x, y)
+        if self.full_redraw:
+            screen.blit(self.grid_surface, (0, 0))
+            screen.blit(self.layer, (0, 0))
+            self.draw_sidebar()
+            pygame.display.flip()
+            self.full_redraw = False
+        else:
+            for rect in self.dirty_rects:
+                screen.blit(self.grid_surface, rect, rect)
+                screen.blit(self.layer, rect, rect)
+            self.draw_sidebar()
+            pygame.display.update(self.dirty_rects + [SIDEBAR_RECT])
+        self.dirty_rects = []
 
     def run(self):
         clock = pygame.time.Clock()
         while True:
-            screen.fill(BLACK)
-            draw_grid()
-            self.draw_sidebar()
-            self.redraw_all()
+            frame_start = time.perf_counter()
 
             for event in pygame.event.get():
                 if event.type == QUIT:
@@ -176,7 +192,11 @@ class RasterizationApp:
                             else:
                                 self.input_active = False
                         else:
-                            if self.algorithm == "Circle":
+                            if self.algorithm == "Erase":
+                                self.erase_at(event.pos[0] // GRID_SIZE, event.pos[1] // GRID_SIZE)
+                            elif self.algorithm == "Polygon":
+                                self.polygon.append((event.pos[0] // GRID_SIZE, event.pos[1] // GRID_SIZE))
+                            elif self.algorithm == "Circle":
                                 self.start_point = (event.pos[0] // GRID_SIZE, event.pos[1] // GRID_SIZE)
                                 if self.input_radius.isdigit():
                                     self.radius = int(self.input_radius)
@@ -189,6 +209,9 @@ class RasterizationApp:
                                     self.end_point = (event.pos[0] // GRID_SIZE, event.pos[1] // GRID_SIZE)
                                     self.draw_algorithm()
                                     self.drawing = False
+                    elif event.button == 3 and self.algorithm == "Polygon" and len(self.polygon) >= 3:
+                        # Right click closes the polygon and fills it.
+                        self.draw_algorithm()
                 elif event.type == KEYDOWN:
                     if self.input_active:
                         if event.key == pygame.K_RETURN:
@@ -200,23 +223,38 @@ class RasterizationApp:
                         else:
                             if event.unicode.isdigit():
                                 self.input_radius += event.unicode
+                    elif event.key == pygame.K_s and event.mod & pygame.KMOD_CTRL:
+                        save_scene(SCENE_PATH, self.shapes.layers())
 
             mouse_pos = pygame.mouse.get_pos()
             if event.type == MOUSEBUTTONDOWN and event.button == 1:
                 if mouse_pos[0] > WIDTH - SIDE_PANEL_WIDTH:
-                    for i, algo in enumerate(["Step by Step", "DDA", "Bresenham", "Circle", "Clear"]):
+                    for i, algo in enumerate(["Step by Step", "DDA", "Bresenham", "Wu", "Circle", "Polygon", "Erase", "Clear"]):
                         if 120 + i * 30 <= mouse_pos[1] <= 120 + (i + 1) * 30:
                             if algo == "Clear":
                                 self.start_point = (0, 0)
                                 self.end_point = (0, 0)
+                                self.polygon = []
+                                self.shapes = ShapeIndex()
                                 self.drawn_points.clear()
-                                screen.fill(BLACK)
+                                self.coverage.fill(0)
+                                self.layer.fill(BLACK)
+                                self.full_redraw = True
                             else:
                                 self.algorithm = algo
 
-            pygame.display.flip()
+            self.redraw_all()
+            self.frame_time = time.perf_counter() - frame_start
+            self.fps = clock.get_fps()
             clock.tick(60)
 
 if __name__ == "__main__":
+    import pygame
+    from pygame.locals import QUIT, MOUSEBUTTONDOWN, KEYDOWN
+
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Rasterization Algorithms")
+    font = pygame.font.SysFont('Courier New', 18)
     app = RasterizationApp()
     app.run()
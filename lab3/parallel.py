@@ -0,0 +1,92 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from clip import clipped_bresenham_lines, viewport_of
+from framebuffer import draw_circles, new_framebuffer, plot
+
+# Scenes of many Bresenham lines and midpoint circles, drawn with one
+# value into a uint8 framebuffer. render_parallel splits the shapes into
+# one part per worker process, of about equal pixel count. Each worker
+# draws its part into its own shared-memory canvas, and the canvases are
+# merged with max. Every shape writes the same value wherever it lands,
+# so the merge gives exactly what render_serial draws.
+
+BATCH_SIZE = 4096
+
+
+def _shapes(segments, circles):
+    return (np.asarray(segments, dtype=np.int64).reshape(-1, 4),
+            np.asarray(circles, dtype=np.int64).reshape(-1, 3))
+
+def rasterize(buffer, segments=(), circles=(), value=1):
+    # BATCH_SIZE shapes at a time, so the pixel arrays stay small.
+    segments, circles = _shapes(segments, circles)
+    viewport = viewport_of(buffer)
+    for start in range(0, len(segments), BATCH_SIZE):
+        plot(buffer, clipped_bresenham_lines(segments[start:start + BATCH_SIZE], viewport)[0], value)
+    for start in range(0, len(circles), BATCH_SIZE):
+        draw_circles(buffer, circles[start:start + BATCH_SIZE], value)
+    return buffer
+
+def render_serial(width, height, segments=(), circles=(), value=1):
+    return rasterize(new_framebuffer(width, height), segments, circles, value)
+
+
+def shape_costs(segments, circles):
+    # Pixels per shape, roughly: major axis + 1 for a line, 4 sqrt(2) r
+    # for a circle.
+    segments, circles = _shapes(segments, circles)
+    x0, y0, x1, y1 = segments.T
+    lines = np.maximum(np.abs(x1 - x0), np.abs(y1 - y0)) + 1
+    return np.concatenate((lines, 4 * np.sqrt(2) * circles[:, 2] + 1))
+
+def partition(costs, parts):
+    # Bounds of `parts` contiguous runs of about equal total cost.
+    total = np.cumsum(costs)
+    cuts = np.searchsorted(total, total[-1] * np.arange(1, parts) / parts) if len(costs) else np.zeros(parts - 1)
+    return np.concatenate(([0], cuts, [len(costs)])).astype(np.int64)
+
+
+def _render_part(name, shape, segments, circles, value):
+    memory = shared_memory.SharedMemory(name=name)
+    buffer = np.ndarray(shape, dtype=np.uint8, buffer=memory.buf)
+    buffer.fill(0)
+    rasterize(buffer, segments, circles, value)
+    del buffer
+    memory.close()
+
+def render_parallel(width, height, segments=(), circles=(), value=1, workers=None, pool=None):
+    # pool, a ProcessPoolExecutor with at least `workers` processes, saves
+    # starting new processes on every call.
+    workers = workers or os.cpu_count()
+    segments, circles = _shapes(segments, circles)
+    bounds = partition(shape_costs(segments, circles), workers)
+    lines = np.minimum(bounds, len(segments))
+    rings = np.maximum(bounds - len(segments), 0)
+    shape = (height, width)
+
+    canvases = [shared_memory.SharedMemory(create=True, size=width * height) for _ in range(workers)]
+    try:
+        own_pool = pool is None
+        if own_pool:
+            pool = ProcessPoolExecutor(workers)
+        try:
+            futures = [pool.submit(_render_part, canvas.name, shape, segments[lines[i]:lines[i + 1]],
+                                   circles[rings[i]:rings[i + 1]], value)
+                       for i, canvas in enumerate(canvases)]
+            for future in futures:
+                future.result()
+        finally:
+            if own_pool:
+                pool.shutdown()
+        views = [np.ndarray(shape, dtype=np.uint8, buffer=canvas.buf) for canvas in canvases]
+        out = np.maximum.reduce(views)
+        del views
+    finally:
+        for canvas in canvases:
+            canvas.close()
+            canvas.unlink()
+    return out
@@ -0,0 +1,128 @@
+import numpy as np
+
+# Polygons are sequences of (x, y) vertices in grid cells, the coordinates
+# RasterizationApp works in; the last vertex joins the first. A cell is
+# filled when its coordinates lie inside the polygon, with edges owning
+# their top and left side only, so polygons sharing an edge do not
+# overlap. Fills come out as horizontal spans (y, x_start, x_end), ends
+# inclusive, like batch.disk_spans.
+
+EVEN_ODD = 'even-odd'
+NONZERO = 'nonzero'
+RULES = (EVEN_ODD, NONZERO)
+
+
+def edge_table(vertices):
+    # Non-horizontal edges bucketed by their top scanline, each as
+    # [y_end, x, remainder, dx, dy, winding]. x + remainder / dy is where
+    # the edge crosses the current scanline; y_end is exclusive.
+    points = [(int(x), int(y)) for x, y in vertices]
+    table = {}
+    for (x0, y0), (x1, y1) in zip(points, points[1:] + points[:1]):
+        if y0 == y1:
+            continue
+        winding = 1 if y1 > y0 else -1
+        if y0 > y1:
+            x0, y0, x1, y1 = x1, y1, x0, y0
+        table.setdefault(y0, []).append([y1, x0, 0, x1 - x0, y1 - y0, winding])
+    return table
+
+def _spans(y, crossings, rule, spans):
+    # crossings: sorted (first cell right of the edge, winding) pairs.
+    if rule == EVEN_ODD:
+        for (start, _), (stop, _) in zip(crossings[::2], crossings[1::2]):
+            if start < stop:
+                spans.append((y, start, stop - 1))
+        return
+    winding = 0
+    for x, direction in crossings:
+        if winding == 0:
+            start = x
+        winding += direction
+        if winding == 0 and start < x:
+            spans.append((y, start, x - 1))
+
+def polygon_spans(vertices, rule=EVEN_ODD):
+    # Scanline fill with an active edge table. Edges step from one
+    # scanline to the next in integers, like Bresenham: x by dx // dy,
+    # plus one whenever the remainder wraps.
+    if rule not in RULES:
+        raise ValueError(f'unknown fill rule {rule!r}')
+    table = edge_table(vertices)
+    spans = []
+    if not table:
+        return np.empty((0, 3), dtype=np.int32)
+
+    active = []
+    y = min(table)
+    while active or table:
+        active.extend(table.pop(y, ()))
+        crossings = sorted((x + (remainder > 0), winding) for _, x, remainder, _, _, winding in active)
+        _spans(y, crossings, rule, spans)
+
+        y += 1
+        active = [edge for edge in active if edge[0] > y]
+        for edge in active:
+            step, extra = divmod(edge[3], edge[4])
+            edge[1] += step
+            edge[2] += extra
+            if edge[2] >= edge[4]:
+                edge[2] -= edge[4]
+                edge[1] += 1
+        if not active and table:
+            y = min(table)
+    return np.array(spans, dtype=np.int32).reshape(-1, 3)
+
+
+def polygons_spans(polygons, rule=EVEN_ODD):
+    # Fills N polygons at once: the same spans as polygon_spans for each,
+    # as (spans, offsets) like batch.bresenham_lines. Instead of stepping
+    # an active edge table, every edge/scanline crossing is computed in
+    # closed form and the crossings are sorted by polygon, row and x.
+    if rule not in RULES:
+        raise ValueError(f'unknown fill rule {rule!r}')
+    polygons = [np.asarray(polygon, dtype=np.int64).reshape(-1, 2) for polygon in polygons]
+    counts = np.array([len(polygon) for polygon in polygons], dtype=np.int64)
+    offsets = np.zeros(len(polygons) + 1, dtype=np.int64)
+    if not counts.sum():
+        return np.empty((0, 3), dtype=np.int32), offsets
+    start = np.concatenate(polygons)
+    owner = np.repeat(np.arange(len(polygons)), counts)
+    following = np.arange(len(start)) + 1
+    following[np.cumsum(counts)[counts > 0] - 1] = (np.cumsum(counts) - counts)[counts > 0]
+    end = start[following]
+
+    x0, y0 = start.T
+    x1, y1 = end.T
+    winding = np.sign(y1 - y0)
+    down = winding > 0
+    top_x = np.where(down, x0, x1)
+    top_y = np.minimum(y0, y1)
+    dx = np.where(down, x1 - x0, x0 - x1)
+    dy = np.abs(y1 - y0)
+
+    edge = np.repeat(np.arange(len(dy)), dy)
+    t = np.arange(len(edge)) - np.repeat(np.cumsum(dy) - dy, dy)
+    y = top_y[edge] + t
+    # First cell at or right of the crossing: ceil(t * dx / dy).
+    x = top_x[edge] - (-t * dx[edge] // dy[edge])
+    w = winding[edge]
+    owner = owner[edge]
+    order = np.lexsort((w, x, y, owner))
+    y, x, w, owner = y[order], x[order], w[order], owner[order]
+
+    if rule == EVEN_ODD:
+        # Every row of a closed polygon has an even number of crossings.
+        first, second = slice(0, None, 2), slice(1, None, 2)
+    else:
+        # The windings of a row sum to zero, so a running sum over all
+        # crossings restarts at zero on every row.
+        after = np.cumsum(w)
+        before = after - w
+        first = (before == 0) & (after != 0)
+        second = (after == 0) & (before != 0)
+    spans = np.stack((y[first], x[first], x[second] - 1), axis=1)
+    owner = owner[first]
+    filled = spans[:, 1] <= spans[:, 2]
+    np.cumsum(np.bincount(owner[filled], minlength=len(polygons)), out=offsets[1:])
+    return spans[filled].astype(np.int32), offsets
@@ -0,0 +1,173 @@
+def step_by_step(x0, y0, x1, y1):
+    if x0 == x1:  
+        return [(x0, y) for y in range(min(y0, y1), max(y0, y1) + 1)]
+
+    points = []
+    dx = x1 - x0
+    dy = y1 - y0
+    k = dy / dx
+    b = y0 - k * x0
+    step = 1 / max(abs(dx), abs(dy))  
+    x = x0
+    if dx > 0:  
+        while x <= x1:
+            y = k * x + b
+            points.append((round(x), round(y)))
+            x += step
+    else:
+        while x >= x1:
+            y = k * x + b
+            points.append((round(x), round(y)))
+            x -= step
+
+    return points
+def dda_algorithm(x0, y0, x1, y1):
+    dx, dy = x1 - x0, y1 - y0
+    steps = max(abs(dx), abs(dy))
+    x_increment = dx / steps
+    y_increment = dy / steps
+    points = []
+    x, y = x0, y0
+    for _ in range(steps + 1):
+        points.append((round(x), round(y)))
+        x += x_increment
+        y += y_increment
+    return points
+
+def bresenham_line(x0, y0, x1, y1):
+    dx = abs(x1 - x0)
+    dy = abs(y1 - y0)
+    sx = 1 if x0 < x1 else -1
+    sy = 1 if y0 < y1 else -1
+    err = dx - dy
+    points = []
+    while True:
+        points.append((x0, y0))
+        if x0 == x1 and y0 == y1:
+            break
+        e2 = 2 * err
+        if e2 > -dy:
+            err -= dy
+            x0 += sx
+        if e2 < dx:
+            err += dx
+            y0 += sy
+    return points
+
+def bresenham_circle(xc, yc, r):
+    points = []
+    x = r
+    y = 0
+    d = 1 - r
+
+    while x >= y:
+        for xi, yi in [(x, y), (y, x), (-x, y), (-y, x), (x, -y), (-x, -y), (y, -x), (-y, -x)]:
+            points.append((xc + xi, yc + yi))
+        y += 1
+        if d < 0:
+            d += 2 * y + 1
+        else:
+            x -= 1
+            d += 2 * y - 2 * x + 1
+    return points
+
+# 16.16 fixed point: one pixel per major-axis step, integers only. The
+# minor coordinate carries the remainder of its 16.16 increment, so it is
+# exactly floor(i * minor * 2^16 / major) and never drifts; rounding with
+# FIXED_HALF - 1 sends ties down like bresenham_line. Both variants give
+# the same pixels as bresenham_line for major axes up to FIXED_MAX_STEPS =
+# 2^15. Past that, 16 fraction bits can no longer tell a tie from a
+# near-tie and some cells would differ, so longer segments raise
+# ValueError instead.
+FIXED_SHIFT = 16
+FIXED_ONE = 1 << FIXED_SHIFT
+FIXED_HALF = FIXED_ONE >> 1
+FIXED_MAX_STEPS = 1 << (FIXED_SHIFT - 1)
+
+def check_fixed_steps(steps):
+    if steps > FIXED_MAX_STEPS:
+        raise ValueError(f'16.16 fixed-point lines are exact up to {FIXED_MAX_STEPS} steps, not {steps}')
+
+def dda_fixed(x0, y0, x1, y1):
+    dx, dy = x1 - x0, y1 - y0
+    steps = max(abs(dx), abs(dy))
+    check_fixed_steps(steps)
+    if steps == 0:
+        return [(x0, y0)]
+    x_major = abs(dx) >= abs(dy)
+    major_sign = 1 if (dx if x_major else dy) > 0 else -1
+    minor = abs(dy if x_major else dx)
+    minor_sign = 1 if (dy if x_major else dx) > 0 else -1
+    increment, remainder = divmod(minor << FIXED_SHIFT, steps)
+
+    points = []
+    position = 0
+    error = 0
+    for i in range(steps + 1):
+        offset = minor_sign * ((position + FIXED_HALF - 1) >> FIXED_SHIFT)
+        if x_major:
+            points.append((x0 + major_sign * i, y0 + offset))
+        else:
+            points.append((x0 + offset, y0 + major_sign * i))
+        position += increment
+        error += remainder
+        if error >= steps:
+            error -= steps
+            position += 1
+    return points
+
+def step_by_step_fixed(x0, y0, x1, y1):
+    # Evaluates the line equation at every major-axis step instead of
+    # accumulating, so there is no state to drift; vertical and zero-length
+    # segments need no special case.
+    dx, dy = x1 - x0, y1 - y0
+    steps = max(abs(dx), abs(dy))
+    check_fixed_steps(steps)
+    if steps == 0:
+        return [(x0, y0)]
+    x_major = abs(dx) >= abs(dy)
+    major_sign = 1 if (dx if x_major else dy) > 0 else -1
+    minor = abs(dy if x_major else dx)
+    minor_sign = 1 if (dy if x_major else dx) > 0 else -1
+
+    points = []
+    for i in range(steps + 1):
+        position = (i * minor << FIXED_SHIFT) // steps
+        offset = minor_sign * ((position + FIXED_HALF - 1) >> FIXED_SHIFT)
+        if x_major:
+            points.append((x0 + major_sign * i, y0 + offset))
+        else:
+            points.append((x0 + offset, y0 + major_sign * i))
+    return points
+
+def wu_line(x0, y0, x1, y1):
+    # Xiaolin Wu's anti-aliased line: at every major-axis step the exact
+    # minor coordinate falls between two cells, which split the coverage.
+    # The fraction is kept as an integer error term, as in bresenham_line,
+    # so it does not drift. Returns (x, y, coverage) triples; cells with no
+    # coverage are left out.
+    dx, dy = x1 - x0, y1 - y0
+    steps = max(abs(dx), abs(dy))
+    if steps == 0:
+        return [(x0, y0, 1.0)]
+    x_major = abs(dx) >= abs(dy)
+    major_sign = 1 if (dx if x_major else dy) > 0 else -1
+    minor = abs(dy if x_major else dx)
+    minor_sign = 1 if (dy if x_major else dx) > 0 else -1
+
+    points = []
+    offset = 0
+    error = 0
+    for i in range(steps + 1):
+        coverage = error / steps
+        for cell, weight in ((offset, 1 - coverage), (offset + 1, coverage)):
+            if weight:
+                if x_major:
+                    points.append((x0 + major_sign * i, y0 + minor_sign * cell, weight))
+                else:
+                    points.append((x0 + minor_sign * cell, y0 + major_sign * i, weight))
+        error += minor
+        if error >= steps:
+            error -= steps
+            offset += 1
+    return points
@@ -0,0 +1,225 @@
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from batch import disk_spans, ellipse_points
+from clip import (clipped_bresenham_lines, clipped_circles_points, clipped_dda_line, clipped_step_by_step_line,
+                  clipped_wu_lines)
+from framebuffer import blend, fill_spans, new_framebuffer, plot
+from polygon import polygons_spans
+
+# A scene is a list of layers (tag, rows): rows is an (N, k) int array of
+# primitives, all drawn by the algorithm the tag names, and layers are
+# drawn in order. Scene files hold the same, little-endian:
+#   magic (8 bytes), layer count (uint32), 4 reserved bytes
+#   one LAYER record per layer: tag, rows, columns, data offset
+#   each layer's int32 rows in C order at its offset, 64-byte aligned
+# so load_scene can memory-map the rows instead of reading them.
+
+MAGIC = b'LAB3SCN\x01'
+HEADER = np.dtype([('magic', 'S8'), ('layers', '<u4'), ('reserved', '<u4')])
+LAYER = np.dtype([('tag', 'S16'), ('rows', '<u8'), ('columns', '<u4'), ('reserved', '<u4'), ('offset', '<u8')])
+ALIGNMENT = 64
+BATCH_SIZE = 4096
+
+# tag -> columns; polygon rows are x0, y0, x1, y1, ... of one polygon
+# each, so any even number from 6 up.
+COLUMNS = {
+    'step_by_step': 4,
+    'dda': 4,
+    'bresenham': 4,
+    'wu': 4,
+    'circle': 3,
+    'disk': 3,
+    'ellipse': 4,
+    'polygon': None,
+}
+
+
+def check_layer(tag, rows):
+    rows = np.asarray(rows)
+    if tag not in COLUMNS:
+        raise ValueError(f'unknown primitive {tag!r}')
+    columns = COLUMNS[tag]
+    if rows.ndim == 2 and columns is None:
+        valid = rows.shape[1] >= 6 and rows.shape[1] % 2 == 0
+    else:
+        valid = rows.ndim == 2 and rows.shape[1] == columns
+    if not valid:
+        raise ValueError(f'{tag} rows must be (N, {columns or "2 * vertices"}), not {rows.shape}')
+    return rows
+
+
+def save_scene(path, layers):
+    layers = [(tag, check_layer(tag, rows)) for tag, rows in layers]
+    table = np.zeros(len(layers), dtype=LAYER)
+    offset = HEADER.itemsize + table.nbytes
+    for record, (tag, rows) in zip(table, layers):
+        offset = -(-offset // ALIGNMENT) * ALIGNMENT
+        record['tag'] = tag.encode('ascii')
+        record['rows'], record['columns'] = rows.shape
+        record['offset'] = offset
+        offset += rows.size * 4
+
+    header = np.zeros(1, dtype=HEADER)
+    header['magic'] = MAGIC
+    header['layers'] = len(layers)
+    with open(path, 'wb') as f:
+        f.write(header.tobytes())
+        f.write(table.tobytes())
+        for record, (tag, rows) in zip(table, layers):
+            f.seek(int(record['offset']))
+            f.write(np.ascontiguousarray(rows, dtype='<i4').tobytes())
+        f.truncate(offset)
+
+def load_scene(path):
+    header = np.fromfile(path, dtype=HEADER, count=1)
+    if len(header) == 0 or header['magic'][0] != MAGIC:
+        raise ValueError(f'{path} is not a scene file')
+    table = np.fromfile(path, dtype=LAYER, count=int(header['layers'][0]), offset=HEADER.itemsize)
+    layers = []
+    for record in table:
+        shape = (int(record['rows']), int(record['columns']))
+        rows = (np.memmap(path, dtype='<i4', mode='r', offset=int(record['offset']), shape=shape)
+                if shape[0] else np.empty(shape, dtype=np.int32))
+        layers.append((record['tag'].decode('ascii'), rows))
+    return layers
+
+def scene_layers(shapes):
+    # Groups (tag, values) primitives, in drawing order, into layers: a new
+    # layer starts wherever the tag or the number of values changes.
+    layers = []
+    for tag, values in shapes:
+        if layers and layers[-1][0] == tag and len(layers[-1][1][-1]) == len(values):
+            layers[-1][1].append(values)
+        else:
+            layers.append((tag, [values]))
+    return [(tag, np.array(rows, dtype=np.int32)) for tag, rows in layers]
+
+
+# Renderers draw into a buffer whose cell [0, 0] is cell `origin` of the
+# grid, so a buffer can hold just one window of the scene (see
+# spatial.redraw). Everything is clipped to that window, and the pixels
+# are computed in grid coordinates and only then shifted. So a window
+# gets exactly the cells a whole framebuffer would have there.
+
+def _window(buffer, origin):
+    x_min, y_min = origin
+    x_max, y_max = x_min + buffer.shape[1] - 1, y_min + buffer.shape[0] - 1
+    return x_min, y_min, x_max, y_max
+
+def _shift_spans(spans, origin):
+    return spans - np.array([origin[1], origin[0], origin[0]])
+
+def _step_by_step(buffer, rows, value, origin=(0, 0)):
+    viewport = _window(buffer, origin)
+    for row in rows.tolist():
+        plot(buffer, clipped_step_by_step_line(*row, viewport) - origin, value)
+
+def _dda(buffer, rows, value, origin=(0, 0)):
+    viewport = _window(buffer, origin)
+    for row in rows.tolist():
+        plot(buffer, clipped_dda_line(*row, viewport) - origin, value)
+
+def _bresenham(buffer, rows, value, origin=(0, 0)):
+    plot(buffer, clipped_bresenham_lines(rows, _window(buffer, origin))[0] - origin, value)
+
+def _wu(buffer, rows, value, origin=(0, 0)):
+    coords, coverage, _ = clipped_wu_lines(rows, _window(buffer, origin))
+    blend(buffer, coords - origin, coverage, value)
+
+def _circles(buffer, rows, value, origin=(0, 0)):
+    plot(buffer, clipped_circles_points(rows, _window(buffer, origin)) - origin, value)
+
+def _disks(buffer, rows, value, origin=(0, 0)):
+    for row in rows.tolist():
+        fill_spans(buffer, _shift_spans(disk_spans(*row), origin), value)
+
+def _ellipses(buffer, rows, value, origin=(0, 0)):
+    for row in rows.tolist():
+        plot(buffer, ellipse_points(*row) - origin, value)
+
+def _polygons(buffer, rows, value, origin=(0, 0)):
+    spans, _ = polygons_spans(rows.reshape(len(rows), -1, 2))
+    fill_spans(buffer, _shift_spans(spans, origin), value)
+
+# tag -> function(buffer, rows, value, origin=(0, 0))
+RENDERERS = {
+    'step_by_step': _step_by_step,
+    'dda': _dda,
+    'bresenham': _bresenham,
+    'wu': _wu,
+    'circle': _circles,
+    'disk': _disks,
+    'ellipse': _ellipses,
+    'polygon': _polygons,
+}
+
+def render_scene(layers, width, height, value=255, buffer=None):
+    # Rasterizes the layers BATCH_SIZE rows at a time, so memory-mapped
+    # rows are only read a batch at a time and the pixel arrays stay small.
+    if buffer is None:
+        buffer = new_framebuffer(width, height)
+    for tag, rows in layers:
+        check_layer(tag, rows)
+        for start in range(0, len(rows), BATCH_SIZE):
+            RENDERERS[tag](buffer, np.asarray(rows[start:start + BATCH_SIZE], dtype=np.int64), value)
+    return buffer
+
+
+def random_scene(count, width, height, max_size=64, seed=0):
+    # `count` lines and `count` circles up to max_size cells across, mostly
+    # inside a width x height framebuffer.
+    rng = np.random.default_rng(seed)
+    starts = rng.integers((0, 0), (width, height), (count, 2))
+    segments = np.concatenate((starts, starts + rng.integers(-max_size, max_size + 1, (count, 2))), axis=1)
+    circles = np.concatenate((rng.integers((0, 0), (width, height), (count, 2)),
+                              rng.integers(0, max_size // 2 + 1, (count, 1))), axis=1)
+    return segments, circles
+
+
+def write_image(path, buffer):
+    # PNG through PIL, .npy, or anything else as the raw bytes.
+    if path.lower().endswith('.png'):
+        from PIL import Image
+        Image.fromarray(buffer).save(path)
+    elif path.lower().endswith('.npy'):
+        np.save(path, buffer)
+    else:
+        buffer.tofile(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write and render lab3 scene files without a window.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    render = commands.add_parser('render', help='rasterize a scene to PNG, .npy or raw uint8 bytes')
+    render.add_argument('scene')
+    render.add_argument('output')
+    render.add_argument('--size', type=int, nargs=2, default=(1024, 1024), metavar=('WIDTH', 'HEIGHT'))
+    generate = commands.add_parser('generate', help='write a random scene of lines and circles')
+    generate.add_argument('scene')
+    generate.add_argument('--count', type=int, default=100_000, help='lines and circles each')
+    generate.add_argument('--size', type=int, nargs=2, default=(1024, 1024), metavar=('WIDTH', 'HEIGHT'))
+    generate.add_argument('--max-size', type=int, default=64)
+    generate.add_argument('--seed', type=int, default=0)
+    generate.add_argument('--line', choices=['bresenham', 'dda', 'step_by_step', 'wu'], default='bresenham')
+    args = parser.parse_args()
+
+    if args.command == 'generate':
+        segments, circles = random_scene(args.count, *args.size, args.max_size, args.seed)
+        save_scene(args.scene, [(args.line, segments), ('circle', circles)])
+        return
+
+    start = time.perf_counter()
+    layers = load_scene(args.scene)
+    buffer = render_scene(layers, *args.size)
+    write_image(args.output, buffer)
+    elapsed = time.perf_counter() - start
+    primitives = sum(len(rows) for _, rows in layers)
+    print(f'{primitives} primitives in {elapsed:.2f} s, {primitives / elapsed:.0f} per second', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+import numpy as np
+
+from batch import bresenham_lines, circle_points, dda_line, disk_spans, ellipse_points, step_by_step_line, wu_lines
+from polygon import polygon_spans
+from scene import RENDERERS, check_layer, scene_layers
+
+# Spatial index over drawn primitives, the (tag, values) rows of scene.py.
+# The grid cells are split into square buckets `bucket` cells wide; each
+# primitive is listed in every bucket its bounding box touches. A query
+# only looks at the buckets the query rect covers, so its cost depends on
+# how much is drawn there, not on the scene size. Rects are (x, y, w, h)
+# in grid cells, like the ones the framebuffer draw functions return.
+# Ids count up in drawing order.
+
+DEFAULT_BUCKET = 32
+
+
+def bounding_boxes(tag, rows):
+    # (N, 4) x_min, y_min, x_max, y_max of the cells each primitive can
+    # draw, ends inclusive.
+    rows = np.asarray(check_layer(tag, rows), dtype=np.int64)
+    if tag in ('circle', 'disk', 'ellipse'):
+        xc, yc = rows[:, 0], rows[:, 1]
+        rx = rows[:, 2]
+        ry = rows[:, 3] if tag == 'ellipse' else rx
+        return np.stack((xc - rx, yc - ry, xc + rx, yc + ry), axis=1)
+    # Lines and polygons stay within their vertices.
+    xs, ys = rows[:, 0::2], rows[:, 1::2]
+    return np.stack((xs.min(axis=1), ys.min(axis=1), xs.max(axis=1), ys.max(axis=1)), axis=1)
+
+
+# tag -> function(values) returning the cells as an (M, 2) array, or for
+# filled shapes the spans (y, x_start, x_end).
+PIXELS = {
+    'step_by_step': lambda values: step_by_step_line(*values),
+    'dda': lambda values: dda_line(*values),
+    'bresenham': lambda values: bresenham_lines([values])[0],
+    'wu': lambda values: wu_lines([values])[0],
+    'circle': lambda values: circle_points(*values),
+    'ellipse': lambda values: ellipse_points(*values),
+}
+SPANS = {
+    'disk': lambda values: disk_spans(*values),
+    'polygon': lambda values: polygon_spans(np.reshape(values, (-1, 2))),
+}
+
+def covers(tag, values, x, y):
+    if tag in SPANS:
+        spans = SPANS[tag](values)
+        return bool(np.any((spans[:, 0] == y) & (spans[:, 1] <= x) & (x <= spans[:, 2])))
+    coords = PIXELS[tag](values)
+    return bool(np.any((coords[:, 0] == x) & (coords[:, 1] == y)))
+
+
+class ShapeIndex:
+    # Uniform grid of buckets, kept as a dict from bucket (bx, by) to the
+    # set of ids listed there, so empty buckets cost nothing and shapes can
+    # be added and removed one at a time.
+    def __init__(self, bucket=DEFAULT_BUCKET):
+        self.bucket = bucket
+        self.shapes = {}
+        self.boxes = {}
+        self.buckets = {}
+        self.next_id = 0
+
+    def _bucket_range(self, box):
+        x_min, y_min, x_max, y_max = box
+        b = self.bucket
+        return range(x_min // b, x_max // b + 1), range(y_min // b, y_max // b + 1)
+
+    def add(self, tag, values):
+        return self.add_layer(tag, [values])[0]
+
+    def add_layer(self, tag, rows):
+        # Adds N primitives at once; returns their ids. The (bucket, id)
+        # pairs are built and grouped with NumPy, so the Python work is one
+        # set update per touched bucket rather than one per pair.
+        rows = np.asarray(rows, dtype=np.int64)
+        boxes = bounding_boxes(tag, rows)
+        ids = np.arange(self.next_id, self.next_id + len(rows))
+        self.next_id += len(rows)
+        for shape_id, values, box in zip(ids.tolist(), rows.tolist(), boxes.tolist()):
+            self.shapes[shape_id] = (tag, tuple(values))
+            self.boxes[shape_id] = tuple(box)
+
+        first = boxes[:, :2] // self.bucket
+        counts = boxes[:, 2:] // self.bucket - first + 1
+        per_shape = counts[:, 0] * counts[:, 1]
+        shape = np.repeat(np.arange(len(rows)), per_shape)
+        k = np.arange(len(shape)) - np.repeat(np.cumsum(per_shape) - per_shape, per_shape)
+        bx = first[shape, 0] + k % counts[shape, 0]
+        by = first[shape, 1] + k // counts[shape, 0]
+        order = np.lexsort((by, bx))
+        bx, by, shape_ids = bx[order], by[order], ids[shape][order]
+        starts = np.flatnonzero(np.r_[True, (bx[1:] != bx[:-1]) | (by[1:] != by[:-1])])
+        for start, stop in zip(starts.tolist(), np.r_[starts[1:], len(bx)].tolist()):
+            key = (int(bx[start]), int(by[start]))
+            self.buckets.setdefault(key, set()).update(shape_ids[start:stop].tolist())
+        return ids.tolist()
+
+    def remove(self, shape_id):
+        bxs, bys = self._bucket_range(self.boxes.pop(shape_id))
+        del self.shapes[shape_id]
+        for bx in bxs:
+            for by in bys:
+                ids = self.buckets[bx, by]
+                ids.discard(shape_id)
+                if not ids:
+                    del self.buckets[bx, by]
+
+    def query(self, rect):
+        # Ids of the primitives whose bounding box meets rect, in drawing
+        # order.
+        x, y, w, h = rect
+        x_max, y_max = x + w - 1, y + h - 1
+        bxs, bys = self._bucket_range((x, y, x_max, y_max))
+        if len(bxs) * len(bys) > len(self.buckets):
+            keys = [key for key in self.buckets if key[0] in bxs and key[1] in bys]
+        else:
+            keys = [(bx, by) for bx in bxs for by in bys if (bx, by) in self.buckets]
+        found = set()
+        for key in keys:
+            found.update(self.buckets[key])
+        boxes = self.boxes
+        return sorted(shape_id for shape_id in found if boxes[shape_id][0] <= x_max and boxes[shape_id][2] >= x
+                      and boxes[shape_id][1] <= y_max and boxes[shape_id][3] >= y)
+
+    def at(self, x, y):
+        # Ids of the primitives that draw cell (x, y), topmost last.
+        return [shape_id for shape_id in self.query((x, y, 1, 1)) if covers(*self.shapes[shape_id], x, y)]
+
+    def rect(self, shape_id):
+        x_min, y_min, x_max, y_max = self.boxes[shape_id]
+        return x_min, y_min, x_max - x_min + 1, y_max - y_min + 1
+
+    def layers(self, ids=None, tags=None):
+        # The primitives (all, or just ids) as scene.py layers.
+        ids = sorted(self.shapes) if ids is None else ids
+        return scene_layers(self.shapes[shape_id] for shape_id in ids
+                            if tags is None or self.shapes[shape_id][0] in tags)
+
+    def __len__(self):
+        return len(self.shapes)
+
+
+def redraw(buffer, index, rect, value=1, tags=None):
+    # Re-rasterizes rect of buffer from the index: the cells are cleared
+    # and the primitives meeting rect (only those with one of `tags`, if
+    # given) drawn again, clipped to rect. Returns the rect, clipped to
+    # the buffer, or None if nothing of it is inside.
+    height, width = buffer.shape[:2]
+    x, y, w, h = rect
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + w, width), min(y + h, height)
+    if x0 >= x1 or y0 >= y1:
+        return None
+    rect = (x0, y0, x1 - x0, y1 - y0)
+    # Drawn into a buffer the size of rect, as the window of the grid at
+    # (x0, y0), so the cost follows the rect and not the canvas.
+    scratch = np.zeros((y1 - y0, x1 - x0) + buffer.shape[2:], dtype=buffer.dtype)
+    for tag, rows in index.layers(index.query(rect), tags):
+        RENDERERS[tag](scratch, rows.astype(np.int64), value, (x0, y0))
+    buffer[y0:y1, x0:x1] = scratch
+    return rect
@@ -1,9 +1,11 @@
-import pygame
+import statistics
 import sys
-import time
-from pygame.locals import QUIT, MOUSEBUTTONDOWN, KEYDOWN
 from random import randint
 
+from bench import time_call
+from framebuffer import PixelCanvas
+from raster import step_by_step, dda_algorithm, bresenham_line, bresenham_circle
+
 WIDTH, HEIGHT = 1200, 600
 GRID_SIZE = 5
 BLACK = (0, 0, 0)
@@ -13,11 +15,10 @@ DARK_GRAY = (30, 30, 30)
 BLUE = (0, 100, 255)
 
 SIDE_PANEL_WIDTH = 400
+GRID_COLS = (WIDTH - SIDE_PANEL_WIDTH) // GRID_SIZE
+GRID_ROWS = HEIGHT // GRID_SIZE
+TIMING_TRIALS = 20
 
-pygame.init()
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Rasterization Algorithms")
-font = pygame.font.SysFont('Courier New', 18)
 def draw_grid():
     for x in range(0, WIDTH - SIDE_PANEL_WIDTH, GRID_SIZE):
         pygame.draw.line(screen, DARK_GRAY, (x, 0), (x, HEIGHT))
@@ -30,79 +31,6 @@ def draw_grid():
 def draw_pixel(x, y, color=RED):
     pygame.draw.rect(screen, color, pygame.Rect(x * GRID_SIZE, y * GRID_SIZE, GRID_SIZE, GRID_SIZE))
 
-def step_by_step(x0, y0, x1, y1):
-    if x0 == x1:  
-        return [(x0, y) for y in range(min(y0, y1), max(y0, y1) + 1)]
-
-    points = []
-    dx = x1 - x0
-    dy = y1 - y0
-    k = dy / dx
-    b = y0 - k * x0
-    step = 1 / max(abs(dx), abs(dy))  
-    x = x0
-    if dx > 0:  
-        while x <= x1:
-            y = k * x + b
-            points.append((round(x), round(y)))
-            x += step
-    else:
-        while x >= x1:
-            y = k * x + b
-            points.append((round(x), round(y)))
-            x -= step
-
-    return points
-def dda_algorithm(x0, y0, x1, y1):
-    dx, dy = x1 - x0, y1 - y0
-    steps = max(abs(dx), abs(dy))
-    x_increment = dx / steps
-    y_increment = dy / steps
-    points = []
-    x, y = x0, y0
-    for _ in range(steps + 1):
-        points.append((round(x), round(y)))
-        x += x_increment
-        y += y_increment
-    return points
-
-def bresenham_line(x0, y0, x1, y1):
-    dx = abs(x1 - x0)
-    dy = abs(y1 - y0)
-    sx = 1 if x0 < x1 else -1
-    sy = 1 if y0 < y1 else -1
-    err = dx - dy
-    points = []
-    while True:
-        points.append((x0, y0))
-        if x0 == x1 and y0 == y1:
-            break
-        e2 = 2 * err
-        if e2 > -dy:
-            err -= dy
-            x0 += sx
-        if e2 < dx:
-            err += dx
-            y0 += sy
-    return points
-
-def bresenham_circle(xc, yc, r):
-    points = []
-    x = r
-    y = 0
-    d = 1 - r
-
-    while x >= y:
-        for xi, yi in [(x, y), (y, x), (-x, y), (-y, x), (x, -y), (-x, -y), (y, -x), (-y, -x)]:
-            points.append((xc + xi, yc + yi))
-        y += 1
-        if d < 0:
-            d += 2 * y + 1
-        else:
-            x -= 1
-            d += 2 * y - 2 * x + 1
-    return points
-
 class RasterizationApp:
     def __init__(self):
         self.algorithm = "Bresenham"
@@ -112,28 +40,26 @@ class RasterizationApp:
         self.radius = 0
         self.input_active = False
         self.input_radius = ""
-        self.drawn_points = []
+        self.drawn_points = PixelCanvas(GRID_COLS, GRID_ROWS)
         self.execution_time = 0.0
 
     def draw_algorithm(self):
         x0, y0 = self.start_point
-        start_time = time.time()
-        
-        for _ in range(100):
-            if self.algorithm == "Circle":
-                r = self.radius
-                points = bresenham_circle(x0, y0, r)
-            else:
-                x1, y1 = self.end_point
-                if self.algorithm == "Step by Step":
-                    points = step_by_step(x0, y0, x1, y1)
-                elif self.algorithm == "DDA":
-                    points = dda_algorithm(x0, y0, x1, y1)
-                elif self.algorithm == "Bresenham":
-                    points = bresenham_line(x0, y0, x1, y1)
-
-        self.execution_time = time.time() - start_time
-        self.drawn_points.extend(points)
+        if self.algorithm == "Circle":
+            func, args = bresenham_circle, (x0, y0, self.radius)
+        else:
+            x1, y1 = self.end_point
+            if self.algorithm == "Step by Step":
+                func = step_by_step
+            elif self.algorithm == "DDA":
+                func = dda_algorithm
+            elif self.algorithm == "Bresenham":
+                func = bresenham_line
+            args = (x0, y0, x1, y1)
+
+        samples, _ = time_call(func, args, trials=TIMING_TRIALS)
+        self.execution_time = statistics.median(samples) / 1e9
+        self.drawn_points.add(func(*args))
 
     def draw_sidebar(self):
         pygame.draw.rect(screen, BLUE, (WIDTH - SIDE_PANEL_WIDTH, 0, SIDE_PANEL_WIDTH, HEIGHT))
@@ -145,7 +71,7 @@ class RasterizationApp:
         radius_text = font.render(self.input_radius, True, WHITE)
         screen.blit(radius_text, (input_box.x + 5, input_box.y + 5))
 
-        time_text = font.render(f'Время (100 операций): {self.execution_time:.6f} с', True, WHITE)
+        time_text = font.render(f'Время (медиана {TIMING_TRIALS} замеров): {self.execution_time:.6f} с', True, WHITE)
         screen.blit(time_text, (WIDTH - SIDE_PANEL_WIDTH + 10, 90))
 
         algorithms = ["Step by Step", "DDA", "Bresenham", "Circle", "Clear"]
@@ -155,7 +81,7 @@ class RasterizationApp:
             screen.blit(label, (WIDTH - SIDE_PANEL_WIDTH + 10, 120 + i * 30))
 
     def redraw_all(self):
-        for x, y in self.drawn_points:
+        for x, y in self.drawn_points.points().tolist():
             draw_pixel(x, y)
             
     def test(self):
@@ -271,5 +197,12 @@ class RasterizationApp:
             clock.tick(60)
 
 if __name__ == "__main__":
+    import pygame
+    from pygame.locals import QUIT, MOUSEBUTTONDOWN, KEYDOWN
+
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Rasterization Algorithms")
+    font = pygame.font.SysFont('Courier New', 18)
     app = RasterizationApp()
     app.run()
@@ -0,0 +1,60 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+TK_ROOT = '''
+import tkinter
+try:
+    tkinter.Tk()
+except tkinter.TclError:
+    pass
+'''
+
+PYGAME_WINDOW = '''
+import pygame
+pygame.init()
+pygame.display.set_mode((800, 600))
+pygame.font.SysFont('Courier New', 18)
+'''
+
+# (lab, headless core import, what importing the GUI script used to do)
+CASES = [
+    ('lab1', 'import colors', 'import colors' + TK_ROOT),
+    ('lab2', 'import filters', 'import filters\nimport PIL.ImageTk' + TK_ROOT),
+    ('lab3', 'import raster', 'import raster' + PYGAME_WINDOW),
+]
+
+
+def time_startup(lab, code, runs):
+    env = dict(os.environ, SDL_VIDEODRIVER='dummy', SDL_AUDIODRIVER='dummy',
+               PYGAME_HIDE_SUPPORT_PROMPT='1')
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], cwd=os.path.join(ROOT, lab), env=env,
+                       check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare worker startup with and without the GUI toolkits.')
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    baseline = time_startup('.', 'pass', args.runs)
+    print(f'{"lab":<6}{"core, ms":>12}{"with GUI, ms":>16}')
+    print(f'{"python":<6}{baseline * 1000:>12.1f}')
+    for lab, core, gui in CASES:
+        core_time = time_startup(lab, core, args.runs)
+        gui_time = time_startup(lab, gui, args.runs)
+        print(f'{lab:<6}{core_time * 1000:>12.1f}{gui_time * 1000:>16.1f}')
+
+
+if __name__ == '__main__':
+    main()